@@ -0,0 +1,139 @@
+"""Local stand-in for grafana.com dashboard downloads and the Grafana HTTP API.
+
+Serves ``/api/dashboards/{id}/revisions/{rev}/download`` with ETags (answering
+``304`` to matching ``If-None-Match``) and, per workspace under
+``/ws/{name}``, the Grafana endpoints used by ``grafana-setup.py``:
+``GET /api/datasources``, ``GET /api/dashboards/uid/{uid}`` and
+``POST /api/dashboards/import``. ``GET /_bench/stats`` returns request
+counters; ``POST`` resets them.
+
+    python benchmarks/fake_grafana.py --port 3000 --workspaces 3
+    GRAFANA_DASHBOARDS_URL=http://127.0.0.1:3000 python scripts/grafana-setup.py \\
+        --token test --grafana-url http://127.0.0.1:3000/ws/ws-0 --grafana-url http://127.0.0.1:3000/ws/ws-1
+"""
+import re
+import json
+import time
+import hashlib
+import threading
+import argparse
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+
+DOWNLOAD = re.compile(r'^/api/dashboards/(\d+)/revisions/(\d+)/download$')
+WORKSPACE = re.compile(r'^/ws/([^/]+)(/api/.*)$')
+
+def _dashboard(gnet_id, revision):
+    return {
+        '__inputs': [{'name': 'DS_PROMETHEUS', 'type': 'datasource', 'pluginId': 'prometheus'}],
+        'title': f"Dashboard {gnet_id}",
+        'version': revision,
+        'panels': [{'id': 1, 'type': 'timeseries', 'datasource': '${DS_PROMETHEUS}'}],
+    }
+
+class FakeGrafanaState:
+    def __init__(self, workspaces=1, latency=0.0):
+        self.latency = latency
+        self.workspaces = {f'ws-{i}': {} for i in range(workspaces)}
+        self.revisions = {}
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    def download(self, gnet_id, revision):
+        body = json.dumps(self.revisions.get((gnet_id, revision)) or _dashboard(gnet_id, revision)).encode()
+        return body, f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+
+class FakeGrafanaHandler(BaseHTTPRequestHandler):
+    state = None
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b'', headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        for key, value in {'Content-Type': 'application/json', **(headers or {})}.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self, method):
+        path = urlsplit(self.path).path
+        length = int(self.headers.get('Content-Length') or 0)
+        payload = json.loads(self.rfile.read(length)) if length else None
+        if path == '/_bench/stats':
+            with self.state.lock:
+                stats = dict(self.state.stats, total=sum(self.state.stats.values()))
+                if method == 'POST':
+                    self.state.stats.clear()
+            return self._send(200, stats)
+
+        time.sleep(self.state.latency)
+        if method == 'GET' and (match := DOWNLOAD.match(path)):
+            self._count('download')
+            body, etag = self.state.download(int(match.group(1)), int(match.group(2)))
+            if self.headers.get('If-None-Match') == etag:
+                return self._send(304, headers={'ETag': etag})
+            return self._send(200, body, {'ETag': etag})
+
+        if not (match := WORKSPACE.match(path)) or match.group(1) not in self.state.workspaces:
+            return self._send(404, {'message': 'Not found'})
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            return self._send(401, {'message': 'Unauthorized'})
+        dashboards, api_path = self.state.workspaces[match.group(1)], match.group(2)
+        if method == 'GET' and api_path == '/api/datasources':
+            self._count('datasources')
+            return self._send(200, [{'uid': 'prom', 'name': 'Prometheus', 'type': 'prometheus', 'isDefault': True}])
+        if method == 'GET' and api_path.startswith('/api/dashboards/uid/'):
+            self._count('get_dashboard')
+            uid = api_path.rsplit('/', 1)[1]
+            if uid not in dashboards:
+                return self._send(404, {'message': 'Dashboard not found'})
+            return self._send(200, {'dashboard': dashboards[uid], 'meta': {}})
+        if method == 'POST' and api_path == '/api/dashboards/import':
+            self._count('import')
+            dashboard = payload['dashboard']
+            missing = [item['name'] for item in dashboard.get('__inputs', []) if item['name'] not in {i['name'] for i in payload.get('inputs', [])}]
+            if missing:
+                return self._send(400, {'message': f"missing inputs: {missing}"})
+            with self.state.lock:
+                dashboards[dashboard['uid']] = dashboard
+            return self._send(200, {'uid': dashboard['uid'], 'imported': True})
+        return self._send(404, {'message': 'Not found'})
+
+    def _count(self, route):
+        with self.state.lock:
+            self.state.stats[route] += 1
+
+    def do_GET(self):
+        self._route('GET')
+
+    def do_POST(self):
+        self._route('POST')
+
+def start_server(state, host='127.0.0.1', port=0):
+    """Start the fake Grafana on a background thread and return it"""
+    handler = type('Handler', (FakeGrafanaHandler,), {'state': state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake grafana.com / Grafana API server")
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument('--workspaces', type=int, default=1)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    args = parser.parse_args()
+
+    server = start_server(FakeGrafanaState(args.workspaces, args.latency_ms / 1000), port=args.port)
+    print(f"Fake Grafana listening on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
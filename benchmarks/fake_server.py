@@ -0,0 +1,370 @@
+"""Local stand-in for the ArgoCD REST API and the Key Vault secrets API.
+
+Implements the endpoints used by the scripts (session, applications incl. the
+watch stream, projects, repositories, write repositories) plus Key Vault's
+``GET /secrets/{name}`` and the Kubernetes ``Application``/``AppProject``
+custom resource endpoints (list, server-side apply, delete) backed by the same
+objects, with configurable latency, error rate and rate limiting. Like
+ArgoCD's controller, a fake controller refreshes the status (and
+resourceVersion) of a written application ``--reconcile-ms`` later; the
+write itself returns the previous status.
+``GET /_bench/stats`` returns request counters; ``POST`` resets them.
+"""
+import json
+import queue
+import random
+import threading
+import time
+import argparse
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, unquote
+
+API = '/api/v1'
+KUBE_API = '/apis/argoproj.io/v1alpha1/namespaces/'
+# custom resource plural -> (kind, ArgoCD collection)
+KUBE_RESOURCES = {'applications': ('Application', 'applications'), 'appprojects': ('AppProject', 'projects')}
+
+class TokenBucket:
+    """Simple token bucket; ``rate`` requests per second, bursting up to ``rate``"""
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Return 0 when a token was taken, otherwise the seconds until one is available"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+class FakeState:
+    """Objects held by the fake server plus request counters"""
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=0, secrets=None, status_resources=0, reconcile_delay=0.0):
+        self.latency = latency
+        self.status_resources = status_resources
+        self.reconcile_delay = reconcile_delay
+        self.reconcile_queue = queue.Queue()
+        threading.Thread(target=self._controller, daemon=True).start()
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.bucket = TokenBucket(rate_limit) if rate_limit else None
+        self.secrets = secrets or {}
+        self.objects = {'applications': {}, 'projects': {}, 'repositories': {}, 'write-repositories': {}}
+        self.stats = Counter()
+        self.lock = threading.Lock()
+        self.resource_version = 0
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+            self.stats['total'] += 1
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+
+    def next_resource_version(self):
+        with self.lock:
+            self.resource_version += 1
+            return str(self.resource_version)
+
+    def reconcile_later(self, collection, key):
+        """Have the fake application controller refresh an application's status ``reconcile_delay`` after a write"""
+        self.reconcile_queue.put((time.monotonic() + self.reconcile_delay, collection, key))
+
+    def _controller(self):
+        # Like ArgoCD's controller, status only changes after the write, with a new resourceVersion
+        while True:
+            due, collection, key = self.reconcile_queue.get()
+            time.sleep(max(0.0, due - time.monotonic()))
+            with self.lock:
+                if (obj := self.objects[collection].get(key)) is None:
+                    continue
+                self.resource_version += 1
+                status = dict(_application_status(self.status_resources), reconciledAt=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()))
+                metadata = dict(obj['metadata'], resourceVersion=str(self.resource_version))
+                self.objects[collection][key] = {**obj, 'metadata': metadata, 'status': status}
+
+def _application_status(resources=0):
+    """Application status; ``resources`` managed objects make it as large as a real app's"""
+    status = {'sync': {'status': 'Synced'}, 'health': {'status': 'Healthy'}}
+    if not resources:
+        return status
+    managed = [
+        {'group': 'apps', 'version': 'v1', 'kind': 'Deployment', 'namespace': 'default', 'name': f'workload-{i}',
+         'status': 'Synced', 'health': {'status': 'Healthy', 'message': 'Deployment is available'}}
+        for i in range(resources)
+    ]
+    revision = '0' * 40
+    status.update(
+        resources=managed,
+        summary={'images': [f'registry.example.com/workload-{i}:1.0.{i}' for i in range(resources)]},
+        history=[{'id': i, 'revision': revision, 'deployedAt': '2024-01-01T00:00:00Z', 'source': {'repoURL': 'https://example.com/repo.git', 'path': '.'}} for i in range(10)],
+        operationState={
+            'phase': 'Succeeded', 'message': 'successfully synced', 'startedAt': '2024-01-01T00:00:00Z', 'finishedAt': '2024-01-01T00:00:05Z',
+            'operation': {'sync': {'revision': revision}},
+            'syncResult': {'revision': revision, 'resources': [
+                {'group': item['group'], 'version': item['version'], 'kind': item['kind'], 'namespace': item['namespace'], 'name': item['name'],
+                 'status': 'Synced', 'message': f"deployment.apps/{item['name']} configured", 'hookPhase': 'Running', 'syncPhase': 'Sync'}
+                for item in managed
+            ]},
+        },
+    )
+    return status
+
+def _fields(obj):
+    """managedFields ``fieldsV1`` set of an object (lists are owned as a whole)"""
+    return {f'f:{key}': _fields(value) if isinstance(value, dict) and value else {} for key, value in obj.items()}
+
+def _changed_paths(old, new, prefix=()):
+    """``fieldsV1`` paths whose value differs between two objects"""
+    for key in set(old) | set(new):
+        path = prefix + (f'f:{key}',)
+        if isinstance(old.get(key), dict) and isinstance(new.get(key), dict):
+            yield from _changed_paths(old[key], new[key], path)
+        elif old.get(key) != new.get(key):
+            yield path
+
+def _without(fields, path):
+    """Copy of a fieldsV1 set without ``path``"""
+    if not path or path[0] not in fields:
+        return fields
+    if len(path) == 1:
+        return {k: v for k, v in fields.items() if k != path[0]}
+    return {**fields, path[0]: _without(fields[path[0]], path[1:])}
+
+def _managed_fields(previous, manager, operation, fields, changed=()):
+    """Replace ``manager``'s managedFields entry, keeping every other manager's minus the ``changed`` paths it lost"""
+    entries, changed = [], list(changed)
+    for entry in (previous or {}).get('metadata', {}).get('managedFields') or []:
+        if entry['manager'] == manager:
+            continue
+        for path in changed:
+            entry = {**entry, 'fieldsV1': _without(entry['fieldsV1'], path)}
+        entries.append(entry)
+    return entries + [{'manager': manager, 'operation': operation, 'apiVersion': 'argoproj.io/v1alpha1',
+                       'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), 'fieldsType': 'FieldsV1', 'fieldsV1': fields}]
+
+class FakeArgoCDHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without TCP_NODELAY every response waits for a delayed ACK
+    disable_nagle_algorithm = True
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        data = json.dumps(body if body is not None else {}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}') if length else {}
+
+    def _throttle(self):
+        """Apply rate limiting, latency and injected errors; True when the request was answered"""
+        state = self.state
+        if state.bucket and (retry_after := state.bucket.acquire()):
+            state.count('429')
+            self._send(429, {'error': 'rate limited'}, {'Retry-After': f"{retry_after:.2f}"})
+            return True
+        if state.latency or state.jitter:
+            time.sleep(max(0.0, state.latency + random.uniform(-state.jitter, state.jitter)))
+        if state.error_rate and random.random() < state.error_rate:
+            state.count('503')
+            self._send(503, {'error': 'injected failure'})
+            return True
+        return False
+
+    def _route(self, method):
+        url = urlsplit(self.path)
+        path, query = url.path, parse_qs(url.query)
+        if path == '/_bench/stats':
+            if method == 'POST':
+                self.state.reset()
+            return self._send(200, dict(self.state.stats))
+
+        self.state.count(f"{method} {self._route_name(path)}")
+        self._body_cache = self._body() if method in ('POST', 'PUT', 'PATCH') else {}
+        if self._throttle():
+            return
+
+        if path.startswith('/secrets/'):
+            return self._secret(unquote(path[len('/secrets/'):]).split('/')[0])
+        if path == f'{API}/session' and method == 'POST':
+            return self._send(200, {'token': _fake_jwt()})
+        if path == f'{API}/stream/applications':
+            return self._watch(query)
+        if path.startswith(KUBE_API):
+            parts = [unquote(part) for part in path[len(KUBE_API):].split('/')]
+            if len(parts) in (2, 3) and parts[1] in KUBE_RESOURCES:
+                return self._custom_resource(method, parts[0], parts[1], parts[2] if len(parts) == 3 else None, query)
+        for collection in ('applications', 'projects', 'repositories', 'write-repositories'):
+            prefix = f'{API}/{collection}'
+            if path == prefix or path.startswith(prefix + '/'):
+                name = unquote(path[len(prefix) + 1:]) if path != prefix else None
+                return self._collection(method, collection, name, query)
+        self._send(404, {'error': f'no route for {method} {path}'})
+
+    @staticmethod
+    def _route_name(path):
+        if path.startswith('/secrets/'):
+            return 'secrets'
+        if path.startswith(KUBE_API):
+            parts = path[len(KUBE_API):].split('/')
+            return f"kube {parts[1] if len(parts) > 1 else ''}{'/{name}' if len(parts) > 2 else ''}"
+        parts = path[len(API) + 1:].split('/') if path.startswith(API) else [path]
+        return parts[0] if len(parts) == 1 else f"{parts[0]}/{{name}}"
+
+    def _secret(self, name):
+        if name not in self.state.secrets:
+            return self._send(404, {'error': {'code': 'SecretNotFound', 'message': name}})
+        self._send(200, {'value': self.state.secrets[name], 'id': f'https://fake.vault/secrets/{name}/1'})
+
+    def _collection(self, method, collection, name, query):
+        objects = self.state.objects[collection]
+        repo_type = collection.endswith('repositories')
+        if method == 'GET' and name is None:
+            return self._send(200, {'metadata': {}, 'items': list(objects.values())})
+        if method == 'GET':
+            return self._send(200, objects[name]) if name in objects else self._send(404, {'error': 'not found'})
+        if method == 'DELETE':
+            if name not in objects:
+                return self._send(404, {'error': 'not found'})
+            objects.pop(name)
+            return self._send(200, {})
+
+        body = self._body_cache
+        upsert = body.get('upsert') is True or query.get('upsert') == ['true']
+        if collection == 'projects':
+            body = body.get('project', body)
+        key = body.get('repo') if repo_type else body.get('metadata', {}).get('name')
+        # Like ArgoCD, creating an existing object succeeds when its spec is identical or with upsert
+        if method == 'POST' and key in objects and not repo_type and not upsert and objects[key].get('spec') != body.get('spec'):
+            return self._send(400, {'error': 'existing object spec is different; use upsert flag to force update'})
+        if method == 'PUT' and key not in objects:
+            return self._send(404, {'error': 'not found'})
+        if repo_type:
+            # Like ArgoCD, never return credentials
+            stored = {k: v for k, v in body.items() if k not in ('password', 'sshPrivateKey', 'tlsClientCertKey')}
+        else:
+            stored = dict(body)
+            stored['metadata'] = dict(
+                body.get('metadata', {}),
+                resourceVersion=self.state.next_resource_version(),
+                managedFields=_managed_fields(objects.get(key), 'argocd-server', 'Update', {'f:spec': _fields(body.get('spec') or {})},
+                                              changed=_changed_paths(objects.get(key, {}).get('spec') or {}, body.get('spec') or {}, ('f:spec',))),
+            )
+            if collection == 'applications':
+                stored['status'] = (objects.get(key) or {}).get('status') or {}
+        objects[key] = stored
+        self._send(200, stored)
+        if collection == 'applications':
+            self.state.reconcile_later(collection, key)
+
+    def _custom_resource(self, method, namespace, plural, name, query):
+        kind, collection = KUBE_RESOURCES[plural]
+        objects = self.state.objects[collection]
+        as_resource = lambda obj: {'apiVersion': 'argoproj.io/v1alpha1', 'kind': kind, **obj}
+        if method == 'GET' and name is None:
+            return self._send(200, {'apiVersion': 'argoproj.io/v1alpha1', 'kind': f'{kind}List', 'metadata': {},
+                                    'items': [as_resource(obj) for obj in objects.values()]})
+        if method == 'GET':
+            return self._send(200, as_resource(objects[name])) if name in objects else self._send(404, {'reason': 'NotFound'})
+        if method == 'DELETE':
+            if objects.pop(name, None) is None:
+                return self._send(404, {'reason': 'NotFound'})
+            return self._send(200, {'status': 'Success'})
+        if method != 'PATCH' or self.headers.get('Content-Type') != 'application/apply-patch+yaml':
+            return self._send(415, {'reason': 'UnsupportedMediaType'})
+        if not (manager := query.get('fieldManager', [None])[0]):
+            return self._send(422, {'reason': 'Invalid', 'message': 'fieldManager is required for apply requests'})
+
+        body = self._body_cache
+        previous = objects.get(name)
+        stored = {k: v for k, v in body.items() if k not in ('apiVersion', 'kind')}
+        metadata = dict(body.get('metadata', {}), namespace=namespace, resourceVersion=self.state.next_resource_version())
+        applied = {k: v for k, v in stored.items() if k != 'metadata'}
+        applied_metadata = {k: v for k, v in metadata.items() if k in ('labels', 'annotations', 'finalizers')}
+        metadata['managedFields'] = _managed_fields(previous, manager, 'Apply', _fields({**applied, 'metadata': applied_metadata}))
+        stored['metadata'] = metadata
+        if collection == 'applications':
+            stored['status'] = (previous or {}).get('status') or {}
+        objects[name] = stored
+        self._send(201 if previous is None else 200, as_resource(stored))
+        if collection == 'applications':
+            self.state.reconcile_later(collection, name)
+
+    def _watch(self, query):
+        names = set(query.get('name', []))
+        apps = [app for name, app in self.state.objects['applications'].items() if not names or name in names]
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for app in apps:
+            line = json.dumps({'result': {'type': 'ADDED', 'application': app}}).encode() + b'\n'
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(line), line))
+        self.wfile.write(b'0\r\n\r\n')
+
+    def do_GET(self):
+        self._route('GET')
+
+    def do_POST(self):
+        self._route('POST')
+
+    def do_PUT(self):
+        self._route('PUT')
+
+    def do_PATCH(self):
+        self._route('PATCH')
+
+    def do_DELETE(self):
+        self._route('DELETE')
+
+def _fake_jwt():
+    import base64
+    claims = base64.urlsafe_b64encode(json.dumps({'sub': 'admin', 'exp': int(time.time()) + 3600}).encode()).decode().rstrip('=')
+    return f"eyJhbGciOiJIUzI1NiJ9.{claims}.signature"
+
+def start_server(state, host='127.0.0.1', port=0):
+    """Start the fake server on a background thread and return it"""
+    handler = type('Handler', (FakeArgoCDHandler,), {'state': state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake ArgoCD / Key Vault API server for benchmarks")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--rate-limit', type=int, default=0, help="Requests per second before answering 429")
+    parser.add_argument('--status-resources', type=int, default=0, help="Managed resources listed in every application status")
+    parser.add_argument('--reconcile-ms', type=float, default=0, help="Delay before a written application's status is refreshed")
+    args = parser.parse_args()
+
+    state = FakeState(args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate, args.rate_limit,
+                      status_resources=args.status_resources, reconcile_delay=args.reconcile_ms / 1000)
+    server = start_server(state, port=args.port)
+    print(f"Fake ArgoCD listening on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
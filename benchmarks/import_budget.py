@@ -0,0 +1,123 @@
+"""Check the startup cost of every script against a time budget.
+
+Loads each script in a fresh interpreter under ``python -X importtime``
+(without running its ``__main__`` block) and reports the median module load
+time over several runs, the share spent importing, and the slowest top-level
+imports. Exits non-zero when a script exceeds its budget, so heavy SDKs
+creeping back into module scope are caught before they slow down every run.
+
+    python benchmarks/import_budget.py
+    python benchmarks/import_budget.py --repeat 10 --budget argocd-project.py=150 --json startup.json
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = BENCH_DIR.parent / 'scripts'
+
+# Milliseconds each script may take to load; the Azure, ArgoCD and Kubernetes SDKs must stay lazy
+BUDGETS_MS = {
+    'argocd-all.py': 200,
+    'argocd-application.py': 200,
+    'argocd-project.py': 200,
+    'argocd-repository.py': 200,
+    'argocd-watch.py': 200,
+    'grafana-setup.py': 200,
+    'tfvars_parser.py': 50,
+}
+MARKER = '--- script imports ---'
+CHILD = """
+import sys, json, time, runpy
+sys.path.insert(0, {scripts_dir!r})
+sys.stderr.write({marker!r} + '\\n')
+start = time.perf_counter()
+runpy.run_path({script!r}, run_name='import_budget')
+print(json.dumps({{'load_ms': (time.perf_counter() - start) * 1000}}))
+"""
+
+def parse_importtime(stderr):
+    """Cumulative microseconds of each top-level import after the marker line"""
+    imports, started = {}, False
+    for line in stderr.splitlines():
+        if line == MARKER:
+            started = True
+            continue
+        if not started or not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):
+            imports[name.strip()] = int(cumulative)
+    return imports
+
+def measure(script, python=sys.executable):
+    command = [python, '-X', 'importtime', '-c', CHILD.format(scripts_dir=str(SCRIPTS_DIR), marker=MARKER, script=str(SCRIPTS_DIR / script))]
+    result = subprocess.run(command, capture_output=True, text=True, cwd=SCRIPTS_DIR)
+    if result.returncode != 0:
+        raise RuntimeError(f"{script} failed to load:\n{result.stderr.strip().splitlines()[-1]}")
+    imports = parse_importtime(result.stderr)
+    return {
+        'load_ms': json.loads(result.stdout.strip().splitlines()[-1])['load_ms'],
+        'import_ms': sum(imports.values()) / 1000,
+        'imports': imports,
+    }
+
+def run(scripts, budgets, repeat):
+    rows = []
+    for script in scripts:
+        try:
+            samples = [measure(script) for _ in range(repeat)]
+        except RuntimeError as e:
+            rows.append({'script': script, 'error': str(e), 'budget_ms': budgets.get(script), 'over_budget': True})
+            continue
+        slowest = max(samples[-1]['imports'].items(), key=lambda item: item[1], default=(None, 0))
+        load_ms = statistics.median(sample['load_ms'] for sample in samples)
+        rows.append({
+            'script': script,
+            'load_ms': round(load_ms, 1),
+            'import_ms': round(statistics.median(sample['import_ms'] for sample in samples), 1),
+            'slowest_import': f"{slowest[0]} ({slowest[1] / 1000:.1f}ms)" if slowest[0] else '',
+            'budget_ms': budgets.get(script),
+            'over_budget': budgets.get(script) is not None and load_ms > budgets[script],
+        })
+    return rows
+
+def print_table(rows):
+    from rich.console import Console
+    from rich.table import Table
+    table = Table(title="Script startup time (median)")
+    for column in ('script', 'load (ms)', 'imports (ms)', 'budget (ms)', 'slowest import'):
+        table.add_column(column, justify='left' if column in ('script', 'slowest import') else 'right')
+    for row in rows:
+        style = 'red' if row['over_budget'] else None
+        if 'error' in row:
+            table.add_row(row['script'], '-', '-', str(row['budget_ms']), row['error'].splitlines()[-1], style=style)
+            continue
+        table.add_row(row['script'], str(row['load_ms']), str(row['import_ms']), str(row['budget_ms'] or '-'), row['slowest_import'], style=style)
+    Console(width=None if sys.stdout.isatty() else 120).print(table)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the module load time of every script against a budget")
+    parser.add_argument('scripts', nargs='*', help="Scripts to measure (default: all with a budget)")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per script; the median is compared")
+    parser.add_argument('--budget', action='append', default=[], metavar='SCRIPT=MS', help="Override the budget of a script")
+    parser.add_argument('--scale', type=float, default=float(os.environ.get('IMPORT_BUDGET_SCALE', 1)), help="Multiply every budget, for slower machines")
+    parser.add_argument('--json', help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    budgets = {script: budget * args.scale for script, budget in BUDGETS_MS.items()}
+    for override in args.budget:
+        script, _, budget = override.partition('=')
+        budgets[script] = float(budget)
+
+    rows = run(args.scripts or list(BUDGETS_MS), budgets, max(1, args.repeat))
+    print_table(rows)
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2))
+    if over := [row['script'] for row in rows if row['over_budget']]:
+        print(f"Over the startup budget: {', '.join(over)}")
+        sys.exit(1)
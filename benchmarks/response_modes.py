@@ -0,0 +1,136 @@
+"""Compare the per-call cost of full and lean ArgoCD API responses.
+
+For each of ``--sizes`` starts ``fake_server.py`` in its own process with
+applications whose status lists that many managed resources, then updates
+one application ``--calls`` times through ``ArgoCDSession`` with lean
+responses off (the generated client deserializes every response into
+models) and on (the raw response is read for its status and
+``LEAN_RESPONSE_FIELDS``). Reports median wall and CPU time per call and
+the peak memory of one call, measured separately under ``tracemalloc``.
+
+The savings depend on the ArgoCD client's model deserialization, so run it
+with the pyargocd pinned in requirements.txt installed; the client that was
+measured is printed with the results. It also fails when lean calls do not
+come back as raw responses carrying the new resourceVersion, which checks
+that the installed client honours ``_preload_content=False``.
+
+    python benchmarks/response_modes.py
+    python benchmarks/response_modes.py --sizes 0,200,2000 --calls 100 --json responses.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import tracemalloc
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = BENCH_DIR.parent / 'scripts'
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import utils as argocd_utils
+
+MODES = ('full', 'lean')
+APPLICATION = {
+    'metadata': {'name': 'bench', 'namespace': 'argocd'},
+    'spec': {
+        'project': 'default',
+        'source': {'repoURL': 'https://example.com/repo.git', 'path': '.', 'targetRevision': 'HEAD'},
+        'destination': {'server': 'https://kubernetes.default.svc', 'namespace': 'default'},
+    },
+}
+
+def client_description():
+    """Import path and version of the ArgoCD client being measured"""
+    import argocd
+    version = getattr(argocd, '__version__', None)
+    return f"{argocd.__name__} {version or '(unknown version)'} from {Path(argocd.__file__).parent}"
+
+def start_fake_server(resources):
+    """Run fake_server.py in a child process so its work is not measured; return it and its URL"""
+    server = subprocess.Popen(
+        [sys.executable, '-u', str(BENCH_DIR / 'fake_server.py'), '--port', '0', '--status-resources', str(resources)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    return server, server.stdout.readline().split()[-1]
+
+def connect(lean):
+    session = argocd_utils.ArgoCDSession(os.environ['ARGOCD_URL'], 'admin', None, lean_responses=lean)
+    return session.connect()
+
+def update(client):
+    return client.applications.application_service_update('bench', body=APPLICATION, _return_http_data_only=False)
+
+def measure(client, calls):
+    """Median wall and CPU milliseconds per call, the peak memory of one call and the response size"""
+    update(client)
+    wall, cpu = [], []
+    for _ in range(calls):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        response = update(client)
+        cpu.append((time.process_time() - cpu_start) * 1000)
+        wall.append((time.perf_counter() - wall_start) * 1000)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    response = update(client)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    if client.session.lean_responses and not (isinstance(response, argocd_utils.LeanResponse) and 'resource_version' in response.fields):
+        raise SystemExit(f"Lean call returned {type(response).__name__} without a resourceVersion; this client does not support lean responses")
+    size = int(response.headers.get('Content-Length', 0)) if isinstance(response, argocd_utils.LeanResponse) else None
+    return {'wall_ms': statistics.median(wall), 'cpu_ms': statistics.median(cpu), 'peak_kb': peak / 1024, 'response_kb': size and size / 1024}
+
+def run(sizes, calls):
+    os.environ.setdefault('ARGOCD_AUTH_TOKEN', 'bench')
+    rows = []
+    for size in sizes:
+        server, os.environ['ARGOCD_URL'] = start_fake_server(size)
+        try:
+            clients = {mode: connect(mode == 'lean') for mode in MODES}
+            clients['full'].applications.application_service_create(body=APPLICATION, upsert=True)
+            results = {mode: measure(clients[mode], calls) for mode in MODES}
+        finally:
+            server.terminate()
+            server.wait()
+        full, lean = results['full'], results['lean']
+        rows.append({
+            'resources': size,
+            'response_kb': round(lean['response_kb'] or 0, 1),
+            **{f'{mode}_{key}': round(value, 3) for mode in MODES for key, value in results[mode].items() if key != 'response_kb'},
+            'cpu_saved_ms': round(full['cpu_ms'] - lean['cpu_ms'], 3),
+            'cpu_saved_pct': round(100 * (1 - lean['cpu_ms'] / full['cpu_ms']), 1) if full['cpu_ms'] else 0.0,
+        })
+    return rows
+
+def print_table(rows, client):
+    from rich.console import Console
+    from rich.table import Table
+    table = Table(title="Per-call cost of one application update (median)", caption=f"ArgoCD client: {client}")
+    columns = [
+        ('status resources', 'resources'), ('response (KB)', 'response_kb'),
+        ('full wall (ms)', 'full_wall_ms'), ('lean wall (ms)', 'lean_wall_ms'),
+        ('full CPU (ms)', 'full_cpu_ms'), ('lean CPU (ms)', 'lean_cpu_ms'),
+        ('full peak (KB)', 'full_peak_kb'), ('lean peak (KB)', 'lean_peak_kb'),
+        ('CPU saved', 'cpu_saved_pct'),
+    ]
+    for title, _ in columns:
+        table.add_column(title, justify='right')
+    for row in rows:
+        table.add_row(*(f"{row[key]}%" if key == 'cpu_saved_pct' else str(row[key]) for _, key in columns))
+    Console(width=None if sys.stdout.isatty() else 160).print(table)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare full and lean ArgoCD API response handling per call")
+    parser.add_argument('--sizes', default='0,100,1000', help="Comma-separated managed resource counts in the application status")
+    parser.add_argument('--calls', type=int, default=50, help="Timed updates per size and mode")
+    parser.add_argument('--json', help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    client = client_description()
+    rows = run([int(size) for size in args.sizes.split(',')], max(1, args.calls))
+    print_table(rows, client)
+    if args.json:
+        Path(args.json).write_text(json.dumps({'client': client, 'results': rows}, indent=2))
@@ -0,0 +1,252 @@
+"""Benchmark the ArgoCD scripts against the local fake ArgoCD / Key Vault server.
+
+Generates synthetic manifest trees, runs the project, repository and
+application flows (each script in its own interpreter, like the workflows do)
+against ``fake_server.py`` and reports wall time, requests/sec, peak RSS and
+API calls per service. Every size is run twice: a cold pass that creates
+everything and a steady-state pass where nothing changed.
+
+    python benchmarks/run_benchmarks.py --sizes 10,100,1000 --latency-ms 20
+    python benchmarks/run_benchmarks.py --sizes 1000 --json bench.json --baseline main.json
+"""
+import os
+import sys
+import json
+import time
+import runpy
+import argparse
+import tempfile
+import resource
+import subprocess
+from pathlib import Path
+
+import yaml
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = BENCH_DIR.parent / 'scripts'
+sys.path.insert(0, str(BENCH_DIR))
+
+from fake_server import FakeState, start_server
+
+# flow name -> (script, meta YAML file)
+FLOWS = {
+    'project': ('argocd-project.py', 'project.yaml'),
+    'repository': ('argocd-repository.py', 'repository.yaml'),
+    'application': ('argocd-application.py', 'application.yaml'),
+}
+SHARED_SECRETS = ['git_username', 'git_password', 'helm_password']
+# Flows whose script takes --backend
+BACKEND_FLOWS = {'project', 'application'}
+
+def generate_manifests(root, size, vault_url):
+    """Write a synthetic argocd-configs tree with ``size`` applications"""
+    projects = [f'proj-{i}' for i in range(max(1, size // 50))]
+    repos = [f'repo-{i}' for i in range(max(1, size // 10))]
+    for service_type in ('projects', 'repositories', 'applications'):
+        (root / service_type).mkdir(parents=True, exist_ok=True)
+
+    for project in projects:
+        (root / 'projects' / f'{project}.yaml').write_text(yaml.safe_dump({
+            'metadata': {'name': project},
+            'spec': {'sourceRepos': ['*'], 'destinations': [{'namespace': '*', 'server': '*'}]},
+        }))
+    for repo in repos:
+        (root / 'repositories' / f'{repo}.yaml').write_text(
+            "permission: read\n"
+            "spec:\n"
+            f"  repo: https://git.example.com/org/{repo}.git\n"
+            "  type: git\n"
+            "  username: ${git_username}\n"
+            "  password: ${git_password}\n"
+        )
+    for i in range(size):
+        (root / 'applications' / f'app-{i}.yaml').write_text(yaml.safe_dump({
+            'metadata': {'name': f'app-{i}', 'namespace': 'argocd'},
+            'spec': {
+                'project': projects[i % len(projects)],
+                'source': {
+                    'repoURL': f'https://git.example.com/org/{repos[i % len(repos)]}.git',
+                    'targetRevision': 'HEAD',
+                    'path': f'charts/app-{i}',
+                    'helm': {'valueFiles': ['values.yaml'], 'parameters': [{'name': 'replicas', 'value': '2'}]},
+                },
+                'destination': {'server': 'https://kubernetes.default.svc', 'namespace': f'ns-{i % 20}'},
+                'syncPolicy': {'automated': {'prune': True, 'selfHeal': True}, 'syncOptions': ['CreateNamespace=true']},
+            },
+        }))
+
+    secrets = {'azure': {'vault_url': vault_url, 'secret_names': SHARED_SECRETS}}
+    (root / 'project.yaml').write_text(yaml.safe_dump({'projects': {p: {'enabled': True, 'method': 'create', 'upsert': True} for p in projects}}))
+    (root / 'repository.yaml').write_text(yaml.safe_dump({'repositories': {r: {'enabled': True, 'method': 'create', 'secrets': secrets} for r in repos}}))
+    (root / 'application.yaml').write_text(yaml.safe_dump({'applications': {f'app-{i}': {'enabled': True, 'method': 'create'} for i in range(size)}}))
+    return {'project': len(projects), 'repository': len(repos), 'application': size}
+
+class StubSecretClient:
+    """SecretClient lookalike that reads the fake server's Key Vault endpoint over plain HTTP"""
+    def __init__(self, vault_url, credential=None, **kwargs):
+        import requests
+        self.vault_url = vault_url.rstrip('/')
+        self.http = requests.Session()
+
+    def get_secret(self, name):
+        response = self.http.get(f"{self.vault_url}/secrets/{name}", params={'api-version': '7.4'}, timeout=30)
+        response.raise_for_status()
+        return type('KeyVaultSecret', (), {'name': name, 'value': response.json()['value']})
+
+def run_child(script, result_file, script_args):
+    """Run one script in this interpreter with the Key Vault SDK pointed at the fake server"""
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    # utils imports the Azure SDK on first use, so patch the SDK modules themselves
+    import azure.identity
+    import azure.keyvault.secrets
+    azure.keyvault.secrets.SecretClient = StubSecretClient
+    azure.identity.DefaultAzureCredential = lambda: None
+
+    sys.argv = [script, *script_args]
+    # Any other exception leaves exit_code at 1 and propagates after the result is written
+    exit_code = 1
+    start = time.perf_counter()
+    try:
+        runpy.run_path(str(SCRIPTS_DIR / script), run_name='__main__')
+        exit_code = 0
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    finally:
+        Path(result_file).write_text(json.dumps({
+            'wall': time.perf_counter() - start,
+            'exit_code': exit_code,
+            # ru_maxrss is in KiB on Linux
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        }))
+
+def write_kubeconfig(path, server_url):
+    """Point the Kubernetes backend at the fake server's custom resource endpoints"""
+    path.write_text(yaml.safe_dump({
+        'apiVersion': 'v1',
+        'kind': 'Config',
+        'clusters': [{'name': 'fake', 'cluster': {'server': server_url}}],
+        'users': [{'name': 'fake', 'user': {'token': 'bench'}}],
+        'contexts': [{'name': 'fake', 'context': {'cluster': 'fake', 'user': 'fake', 'namespace': 'argocd'}}],
+        'current-context': 'fake',
+    }))
+
+def run_flow(flow, root, env, args):
+    script, meta_file = FLOWS[flow]
+    backend_args = ['--backend', args.backend] if flow in BACKEND_FLOWS else []
+    with tempfile.NamedTemporaryFile(suffix='.json') as result_file:
+        command = [sys.executable, __file__, '--child', script, result_file.name, '--',
+                   '-f', str(root / meta_file), '-c', str(args.concurrency), *backend_args, *args.script_args]
+        child = subprocess.run(command, env=env, check=False,
+                               stdout=None if args.verbose else subprocess.DEVNULL,
+                               stderr=None if args.verbose else subprocess.DEVNULL)
+        if result := Path(result_file.name).read_text():
+            return json.loads(result)
+        # The child died before it could record a result, e.g. on a failed import
+        return {'wall': 0.0, 'exit_code': child.returncode or 1, 'peak_rss_mb': 0.0}
+
+def server_stats(server_url, reset=False):
+    import requests
+    return requests.request('POST' if reset else 'GET', f"{server_url}/_bench/stats", timeout=10).json()
+
+def run_size(size, args):
+    state = FakeState(args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate, args.rate_limit,
+                      secrets={name: f'{name}-value' for name in SHARED_SECRETS})
+    server = start_server(state)
+    server_url = f"http://127.0.0.1:{server.server_address[1]}"
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / 'argocd-configs'
+            counts = generate_manifests(root, size, server_url)
+            write_kubeconfig(Path(tmp) / 'kubeconfig', server_url)
+            env = dict(os.environ,
+                       KUBECONFIG=str(Path(tmp) / 'kubeconfig'),
+                       ARGOCD_URL=server_url,
+                       ARGOCD_ADMIN_PASSWORD='bench',
+                       ARGOCD_VERIFY_SSL='false',
+                       ARGOCD_TOKEN_CACHE=str(Path(tmp) / 'tokens.json'),
+                       ARGOCD_MANIFEST_CACHE=str(Path(tmp) / 'manifests'),
+                       ARGOCD_STATE_FILE=str(Path(tmp) / 'state.json'))
+            for run in ('cold', 'steady'):
+                for flow in args.flows:
+                    server_stats(server_url, reset=True)
+                    result = run_flow(flow, root, env, args)
+                    stats = server_stats(server_url)
+                    requests_total = stats.pop('total', 0)
+                    rows.append({
+                        'size': size,
+                        'run': run,
+                        'flow': flow,
+                        'services': counts[flow],
+                        'wall': round(result['wall'], 3),
+                        'requests': requests_total,
+                        'rps': round(requests_total / result['wall'], 1) if result['wall'] else 0,
+                        'peak_rss_mb': round(result['peak_rss_mb'], 1),
+                        'calls_per_service': round(requests_total / counts[flow], 2),
+                        'exit_code': result['exit_code'],
+                        'requests_by_route': stats,
+                    })
+    finally:
+        server.shutdown()
+    return rows
+
+def print_table(rows):
+    from rich.console import Console
+    from rich.table import Table
+    table = Table(title="ArgoCD script benchmarks")
+    for column in ('size', 'run', 'flow', 'services', 'wall (s)', 'requests', 'req/s', 'peak RSS (MB)', 'calls/service', 'exit'):
+        table.add_column(column, justify='right')
+    for row in rows:
+        table.add_row(*(str(row[key]) for key in ('size', 'run', 'flow', 'services', 'wall', 'requests', 'rps', 'peak_rss_mb', 'calls_per_service', 'exit_code')))
+    Console(width=None if sys.stdout.isatty() else 160).print(table)
+
+def compare_baseline(rows, baseline_file, tolerance):
+    """Return the metrics that regressed by more than ``tolerance`` against a previous --json run"""
+    baseline = {(row['size'], row['run'], row['flow']): row for row in json.loads(Path(baseline_file).read_text())}
+    regressions = []
+    for row in rows:
+        if (previous := baseline.get((row['size'], row['run'], row['flow']))) is None:
+            continue
+        for metric in ('wall', 'calls_per_service', 'peak_rss_mb'):
+            if previous[metric] and row[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{row['flow']} {row['run']} size={row['size']}: {metric} {previous[metric]} -> {row[metric]}")
+    return regressions
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        run_child(sys.argv[2], sys.argv[3], sys.argv[5:])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="Benchmark the ArgoCD scripts against a local fake server")
+    parser.add_argument('--sizes', default='10,100,1000', help="Comma separated application counts (10 to 5000)")
+    parser.add_argument('--flows', default='project,repository,application', help="Comma separated flows to run")
+    parser.add_argument('--latency-ms', type=float, default=10, help="Mean server latency per request")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="Uniform latency jitter per request")
+    parser.add_argument('--error-rate', type=float, default=0, help="Fraction of requests answered with 503")
+    parser.add_argument('--rate-limit', type=int, default=0, help="Requests per second before answering 429 (0 = unlimited)")
+    parser.add_argument('--backend', choices=['argocd', 'kubernetes'], default='argocd', help="--backend of the project and application flows")
+    parser.add_argument('-c', '--concurrency', type=int, default=8, help="--concurrency passed to the scripts")
+    parser.add_argument('--script-args', default='', help="Extra arguments passed to every script")
+    parser.add_argument('--json', help="Write the results to this JSON file")
+    parser.add_argument('--baseline', help="Fail when results regress against this previous --json file")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed regression against the baseline")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Show the scripts' output")
+    args = parser.parse_args()
+    args.flows = [flow for flow in args.flows.split(',') if flow]
+    args.script_args = args.script_args.split()
+
+    rows = []
+    for size in (int(size) for size in args.sizes.split(',')):
+        rows += run_size(size, args)
+    print_table(rows)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2))
+    failed = [f"{row['flow']} {row['run']} size={row['size']}: exit code {row['exit_code']}" for row in rows if row['exit_code']]
+    if failed:
+        print("Failed runs (rerun with --verbose for their output):\n  " + "\n  ".join(failed))
+    if args.baseline and (regressions := compare_baseline(rows, args.baseline, args.tolerance)):
+        print("Regressions against baseline:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,154 @@
+import os
+import sys
+import argparse
+import importlib
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from rich import print
+import utils as argocd_utils
+
+# (meta YAML file, service directory, script module, service type) in dependency order
+SERVICES = [
+    ('project.yaml', 'projects', 'argocd-project', 'project'),
+    ('repository.yaml', 'repositories', 'argocd-repository', 'repository'),
+    ('application.yaml', 'applications', 'argocd-application', 'application'),
+]
+
+def load_services(config_dir, state=None, service_dirs=None, shard=None):
+    """Render the payloads of every service meta YAML present in config_dir, optionally only of ``service_dirs``
+
+    Only applications are split by ``shard``: every shard applies all projects
+    and repositories so its applications never wait on another runner.
+    """
+    services = {}
+    for meta_file, service_dir, module_name, service_type in SERVICES:
+        if service_dirs is not None and service_dir not in service_dirs:
+            continue
+        meta_yaml_file = config_dir / meta_file
+        if not meta_yaml_file.exists():
+            print(f"[yellow] {meta_yaml_file} not found, skipping {service_dir}")
+            continue
+        payloads = argocd_utils.prepare_payload_data(meta_yaml_file, service_type=service_dir, state=state, shard=shard if service_dir == 'applications' else None)
+        services[service_type] = (importlib.import_module(module_name), payloads)
+    return services
+
+def bind_apply_fn(apply_fn, client, live_state, force):
+    return lambda service, body: apply_fn(client, live_state, service, body, force=force)
+
+def link_dependencies(nodes, keys, application_dependencies):
+    """Make applications wait for their project and source repositories.
+
+    Deletions run the other way round: a project or repository being deleted
+    waits for the applications that reference it to be deleted first.
+    """
+    for index, node in enumerate(nodes):
+        if node['service_type'] != 'application':
+            continue
+        project, repo_urls = application_dependencies(node['body'])
+        chains = [keys.get('project', {}).get(project, [])]
+        chains += [keys.get('repository', {}).get(url, []) for url in repo_urls]
+        for chain in filter(None, chains):
+            if node['method'] == 'delete':
+                for dep in chain:
+                    if nodes[dep]['method'] == 'delete':
+                        nodes[dep]['deps'].add(index)
+            elif nodes[chain[-1]]['method'] != 'delete':
+                node['deps'].add(chain[-1])
+
+def apply_services(client, services, force=False, concurrency=argocd_utils.DEFAULT_CONCURRENCY):
+    """Apply the loaded services as one dependency graph and return the per-service results"""
+    with ThreadPoolExecutor(max_workers=len(services)) as executor:
+        live_states = dict(zip(services, executor.map(
+            lambda service: service[0].load_live_state(client, service[1]), services.values()
+        )))
+
+    nodes, keys = [], {}
+    for service_type, (module, payloads) in services.items():
+        keys[service_type] = argocd_utils.add_nodes(
+            nodes,
+            payloads,
+            apply_fn=bind_apply_fn(getattr(module, f'apply_{service_type}'), client, live_states[service_type], force),
+            key_fn=getattr(module, f'{service_type}_key'),
+            service_type=service_type,
+        )
+    if 'application' in services:
+        link_dependencies(nodes, keys, services['application'][0].application_dependencies)
+    return argocd_utils.run_graph(nodes, concurrency=concurrency)
+
+def owned_results(results, shard):
+    """Results this shard reports: its applications, and the projects and repositories hashed to it"""
+    if shard is None:
+        return results
+    index, count = shard
+    return [
+        result for result in results
+        if result['service_type'] == 'application' or argocd_utils.shard_of(result['service'], count) == index
+    ]
+
+def commit_state(state, results):
+    """Record the successfully applied services in the incremental state file"""
+    for _, service_dir, _, service_type in SERVICES:
+        state.commit(service_dir, [result for result in results if result['service_type'] == service_type])
+    state.save()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Argo CD project, repository and application operations in a single run")
+    parser.add_argument('-l', '--host-url', help="Hosted ArgoCD App URL",)
+    parser.add_argument('-t', '--token', help="ArgoCD user account OAuth token with project, repository and applications permissions", required=False)
+    parser.add_argument('--verify-ssl', choices=["true", "false"], help="Verify the ArgoCD server certificate", type=str)
+    parser.add_argument('-d', '--config-dir', help="Directory holding project.yaml, repository.yaml and application.yaml", required=True)
+    parser.add_argument("--force", help="Send updates even when the live object already matches the payload", action='store_true')
+    parser.add_argument("--incremental", help="Only apply services whose meta entry or YAML changed since the last successful apply", action='store_true')
+    parser.add_argument("--state-file", help="Incremental state file of service content hashes", default=argocd_utils.DEFAULT_STATE_FILE)
+    parser.add_argument("--base-ref", help="Detect incremental changes with git diff against this ref instead of the state file")
+    parser.add_argument("--wait", help="Wait for created/updated applications to become Synced and Healthy", action='store_true')
+    parser.add_argument("--wait-timeout", help="Seconds to wait for all applications to converge", type=int, default=argocd_utils.DEFAULT_WAIT_TIMEOUT)
+    parser.add_argument("-c", "--concurrency", help="Maximum number of concurrent ArgoCD API calls", type=int, default=argocd_utils.DEFAULT_CONCURRENCY)
+    parser.add_argument("--trace-file", help="Append timing spans to this JSON-lines file", default=argocd_utils.TRACE_FILE)
+    parser.add_argument("--shard-index", help="Shard of the applications this runner applies, from 0; projects and repositories are applied by every shard", type=int, default=0)
+    parser.add_argument("--shard-count", help="Number of runners the applications are split across by a hash of their name", type=int, default=1)
+    parser.add_argument("--results-file", help="Write the reconcile results as JSON, see argocd-merge-results.py")
+    args = parser.parse_args()
+    argocd_utils.tracer.configure(args.trace_file)
+    if not 0 <= args.shard_index < args.shard_count:
+        parser.error("--shard-index must be at least 0 and below --shard-count")
+    shard = (args.shard_index, args.shard_count) if args.shard_count > 1 else None
+
+    if args.host_url:
+        os.environ["ARGOCD_URL"] = args.host_url
+
+    if args.token:
+        os.environ["ARGOCD_AUTH_TOKEN"] = args.token
+
+    if args.verify_ssl:
+        os.environ["ARGOCD_VERIFY_SSL"] = args.verify_ssl
+
+    state = argocd_utils.ManifestState(args.state_file, base_ref=args.base_ref) if args.incremental else None
+    services = load_services(Path(args.config_dir), state=state, shard=shard)
+    if not any(payloads for _, payloads in services.values()):
+        if state is not None:
+            print("[green] No manifest changes since the last apply")
+        elif shard is not None:
+            print(f"[green] No services in shard {args.shard_index}/{args.shard_count}")
+        else:
+            print(f"[red] No services enabled in:[/red] {args.config_dir}")
+        if args.results_file:
+            argocd_utils.write_results(args.results_file, [], shard)
+        sys.exit(0)
+
+    client = argocd_utils.get_argocd_client(pool_size=args.concurrency)
+    results = apply_services(client, services, force=args.force, concurrency=args.concurrency)
+    argocd_utils.print_summary(results)
+    argocd_utils.print_trace_summary()
+    if args.results_file:
+        argocd_utils.write_results(args.results_file, owned_results(results, shard), shard)
+    if state is not None:
+        commit_state(state, results)
+    if any(result['outcome'] in ('failed', 'blocked') for result in results):
+        sys.exit(1)
+    if args.wait and 'application' in services:
+        module, payloads = services['application']
+        if names := module.changed_application_names({app: module.application_key(body) for app, body in payloads.items() if argocd_utils.RENDER_ERROR not in body}, results):
+            durations = module.wait_for_applications(client, names, timeout=args.wait_timeout)
+            if None in durations.values():
+                sys.exit(1)
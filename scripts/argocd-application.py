@@ -1,12 +1,17 @@
 import os
 import sys
 import argparse
-import argocd
-from pathlib import Path
+import itertools
+import json
 import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from pathlib import Path
 from rich import print
 import utils as argocd_utils
 
+WAIT_MAX_POLL_INTERVAL = 30
+
 def filter_query_params(query_params, method):
     if method == 'create':
         allowed_params = {'upsert', 'validate'}
@@ -16,14 +21,176 @@ def filter_query_params(query_params, method):
         allowed_params = {'validate', 'project'}
     return {k: v for k, v in query_params.items() if k in allowed_params}
         
-def application_exists(client, name, **kwargs):
-    try:
-        _ = client.applications.application_service_get(name, **kwargs)
+def application_exists(live_state, name):
+    if name in live_state:
         return True
-    except argocd.rest.ApiException:
-        print('[yellow] Application not found!')
+    argocd_utils.report_console.print('[yellow] Application not found!')
+    return False
+
+def application_key(body):
+    return body['metadata']['name']
+
+def application_dependencies(body):
+    """Return the project name and source repo URLs an application depends on"""
+    spec = body.get('spec', {})
+    sources = spec.get('sources') or [spec.get('source') or {}]
+    return spec.get('project'), [source['repoURL'] for source in sources if source.get('repoURL')]
+
+def load_live_state(client, payloads):
+    return argocd_utils.LiveState.load(client, 'applications')
+
+def apply_application(client, live_state, app, body, force=False):
+    _method = body.pop('method')
+    query_params  = body.pop('query_params', {})
+    body = argocd_utils.stamp_fingerprint(body)
+    name = body['metadata']['name']
+    
+    app_exists = application_exists(live_state, name)
+    if (resolved := argocd_utils.resolve_method(_method, app_exists)) is None:
+        return None
+    if resolved != _method:
+        argocd_utils.report_console.print(f"[yellow] Application '{name}' {'exists' if app_exists else 'not found'}, switching '{_method}' to '{resolved}'")
+        _method = resolved
+    
+    if _method == 'update' and not force and argocd_utils.is_unchanged(body, live_state.get(name)):
+        return argocd_utils.UNCHANGED
+    
+    query_params = filter_query_params(query_params=query_params, method=_method)
+    if _method == "create":
+        res = client.applications.application_service_create(body=body, _return_http_data_only=False, **query_params)
+        live_state.set(name, body)
+        return res
+    elif _method == "update":
+        res = client.applications.application_service_update(name, body=body, _return_http_data_only=False, **query_params)
+        live_state.set(name, body)
+        return res
+    elif _method == "delete":
+        res = client.applications.application_service_delete(name, _return_http_data_only=False, **query_params)
+        live_state.discard(name)
+        return res
+    raise ValueError(f'Invalid method name passed: {_method}')
+
+def apply_application_resource(backend, live_state, app, body, force=False):
+    """Apply an application as an Application custom resource through the Kubernetes API"""
+    _method = body.pop('method')
+    body.pop('query_params', None)
+    return backend.apply('applications', live_state, body, _method, force=force)
+    
+def _parse_time(value):
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')) if value else None
+    except ValueError:
+        return None
+
+def _parse_http_date(value):
+    try:
+        return parsedate_to_datetime(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+def application_converged(app, written_version=None, written_at=None):
+    """Check whether an application is Synced and Healthy by a status the controller produced after our write.
+
+    The object we wrote (``written_version``) still carries the previous
+    status, and so does one last reconciled before ``written_at``, the
+    server time of our write.
+    """
+    status = app.get('status') or {}
+    if (status.get('sync') or {}).get('status') != 'Synced' or (status.get('health') or {}).get('status') != 'Healthy':
         return False
+    if written_version is not None and (app.get('metadata') or {}).get('resourceVersion') == written_version:
+        return False
+    if written_at is not None:
+        reconciled = _parse_time(status.get('reconciledAt')) or _parse_time((status.get('operationState') or {}).get('finishedAt'))
+        return reconciled is not None and reconciled >= written_at
+    return True
+
+def _watch_applications(client, observe, pending, deadline):
+    """Follow ArgoCD's application watch stream until nothing is pending or the deadline passes.
+
+    Raises ``TypeError`` when the client cannot return the stream raw, see ``_ApiProxy``.
+    """
+    stream = client.applications.application_service_watch(
+        _preload_content=False, _request_timeout=max(1, deadline - time.monotonic())
+    )
+    try:
+        for line in stream:
+            if line.strip():
+                event = json.loads(line).get('result') or {}
+                if app := event.get('application'):
+                    observe(app)
+            if not pending or time.monotonic() >= deadline:
+                return
+    finally:
+        stream.release_conn()
+
+def _poll_applications(client, observe, pending, deadline):
+    """Poll the application list with exponential backoff until nothing is pending or the deadline passes"""
+    interval = 1
+    while pending and (remaining := deadline - time.monotonic()) > 0:
+        try:
+            response = client.applications.application_service_list(_preload_content=False)
+            for app in argocd_utils.response_json(response).get('items') or []:
+                observe(app)
+        except Exception as e:
+            print(f"[yellow] Polling application status failed: {e}")
+        if pending:
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, WAIT_MAX_POLL_INTERVAL)
+
+def wait_for_applications(client, names, timeout=argocd_utils.DEFAULT_WAIT_TIMEOUT):
+    """Wait until every named application is Synced and Healthy, sharing one deadline.
+
+    ``names`` maps each application to what our write returned (see
+    ``changed_application_names``); only status reconciled after that write
+    counts. Follows the watch stream and falls
+    back to adaptive polling when the stream is unavailable or drops. Returns
+    the seconds each application took to converge, or None when it did not
+    converge before the timeout.
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    written = names if isinstance(names, dict) else {name: {} for name in names}
+    pending, converged = set(written), {}
+    
+    def observe(app):
+        name = app.get('metadata', {}).get('name')
+        if name in pending and application_converged(app, written[name].get('resource_version'), _parse_http_date(written[name].get('written_at'))):
+            pending.discard(name)
+            converged[name] = time.monotonic() - start
+            print(f"[green] ✅ {name} is Synced/Healthy after {converged[name]:.1f}s")
+    
+    print(f"⏳ Waiting up to {timeout}s for {len(pending)} application(s) to become Synced/Healthy...")
+    try:
+        _watch_applications(client, observe, pending, deadline)
+    except Exception as e:
+        if pending:
+            print(f"[yellow] Application watch stream unavailable ({e}), falling back to polling")
+    _poll_applications(client, observe, pending, deadline)
     
+    for name in sorted(pending):
+        print(f"[red] ❌ {name} did not become Synced/Healthy within {timeout}s")
+    return {name: converged.get(name) for name in names}
+
+def collect_names(payloads, names):
+    """Pass payloads through, recording the application name of each service in ``names``"""
+    for app, body in payloads:
+        if argocd_utils.RENDER_ERROR not in body:
+            names[app] = application_key(body)
+        yield app, body
+
+def changed_application_names(names, results):
+    """Applications created or updated in this run, given each service's application name.
+
+    Maps each name to the ``resource_version`` and server ``written_at`` time
+    its write returned, when known.
+    """
+    return {
+        names[result['service']]: {field: result[field] for field in ('resource_version', 'written_at') if field in result}
+        for result in results
+        if result['service_type'] == 'application' and result['outcome'] == 'applied' and result['method'] != 'delete'
+    }
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Argo CD Application service operations")
     parser.add_argument('-l', '--host-url', help="Hosted ArgoCD App URL",)
@@ -33,7 +200,23 @@ if __name__ == "__main__":
     parser.add_argument('-s', '--service-type', help="Name of the directory to be used for application services", default='applications')
     parser.add_argument("-u", "--username", help="ArgoCD username", required=False)
     parser.add_argument("-p", "--password", help="ArgoCD password", required=False)
+    parser.add_argument("--force", help="Send updates even when the live object already matches the payload", action='store_true')
+    parser.add_argument("--incremental", help="Only apply services whose meta entry or YAML changed since the last successful apply", action='store_true')
+    parser.add_argument("--state-file", help="Incremental state file of service content hashes", default=argocd_utils.DEFAULT_STATE_FILE)
+    parser.add_argument("--base-ref", help="Detect incremental changes with git diff against this ref instead of the state file")
+    parser.add_argument("--wait", help="Wait for created/updated applications to become Synced and Healthy", action='store_true')
+    parser.add_argument("--wait-timeout", help="Seconds to wait for all applications to converge", type=int, default=argocd_utils.DEFAULT_WAIT_TIMEOUT)
+    parser.add_argument("-c", "--concurrency", help="Maximum number of concurrent ArgoCD API calls", type=int, default=argocd_utils.DEFAULT_CONCURRENCY)
+    parser.add_argument("--backend", help="Apply through the ArgoCD API or as custom resources with Kubernetes server-side apply", choices=["argocd", "kubernetes"], default="argocd")
+    parser.add_argument("--trace-file", help="Append timing spans to this JSON-lines file", default=argocd_utils.TRACE_FILE)
+    parser.add_argument("--shard-index", help="Shard of the services this runner applies, from 0", type=int, default=0)
+    parser.add_argument("--shard-count", help="Number of runners the services are split across by a hash of their name", type=int, default=1)
+    parser.add_argument("--results-file", help="Write the reconcile results as JSON, see argocd-merge-results.py")
     args = parser.parse_args()
+    argocd_utils.tracer.configure(args.trace_file)
+    if not 0 <= args.shard_index < args.shard_count:
+        parser.error("--shard-index must be at least 0 and below --shard-count")
+    shard = (args.shard_index, args.shard_count) if args.shard_count > 1 else None
     
     if args.host_url:
         os.environ["ARGOCD_URL"] = args.host_url
@@ -46,32 +229,48 @@ if __name__ == "__main__":
     
     if args.config_file:
         meta_yaml_file = Path(args.config_file)
-        payloads = argocd_utils.prepare_payload_data(meta_yaml_file, service_type=args.service_type)
-        if not payloads:
+        state = argocd_utils.ManifestState(args.state_file, base_ref=args.base_ref) if args.incremental else None
+        payloads = argocd_utils.stream_payload_data(meta_yaml_file, service_type=args.service_type, state=state, shard=shard)
+        # The first payload decides whether there is anything to do; the rest keep rendering meanwhile
+        if (first := next(payloads, None)) is not None:
+            payloads = itertools.chain([first], payloads)
+        if first is None and (state is not None or shard is not None):
+            print("[green] No manifest changes since the last apply" if state is not None else f"[green] No services in shard {args.shard_index}/{args.shard_count}")
+            if args.results_file:
+                argocd_utils.write_results(args.results_file, [], shard)
+            sys.exit(0)
+        if first is None:
             print(f"Failed to load config file: {args.config_file}")
             sys.exit(1)
             
-        client = argocd_utils.get_argocd_client()
-        res = None
-        for app, body in payloads.items():
-            _method = body.pop('method')
-            query_params  = body.pop('query_params', {})
-            
-            app_exists = application_exists(client, body['metadata']['name']) 
-            if not app_exists and _method == 'delete':
-                argocd_utils.dynamic_width_print()
-                continue
-            
-            query_params = filter_query_params(query_params=query_params, method=_method)
-            if _method == "create":
-                res = client.applications.application_service_create(body=body, _return_http_data_only=False, **query_params)
-            elif _method == "update":
-                res = client.applications.application_service_update(body['metadata']['name'], body=body, _return_http_data_only=False, **query_params)
-            elif _method == "delete":
-                res = client.applications.application_service_delete(body['metadata']['name'], _return_http_data_only=False, **query_params)
-                
-            else:
-                print(f'Error! Invalid method name passed: {_method}')
-            
-            argocd_utils.print_response(res, method=_method, service_name=app, service_type='application')
-            time.sleep(2)
+        if args.backend == 'kubernetes':
+            backend = argocd_utils.KubernetesBackend(pool_size=args.concurrency)
+            live_state = backend.load_live_state('applications')
+            apply_fn = lambda app, body: apply_application_resource(backend, live_state, app, body, force=args.force)
+        else:
+            client = argocd_utils.get_argocd_client(pool_size=args.concurrency)
+            live_state = load_live_state(client, payloads)
+            apply_fn = lambda app, body: apply_application(client, live_state, app, body, force=args.force)
+        names = {}
+        results = argocd_utils.reconcile(
+            collect_names(payloads, names),
+            apply_fn=apply_fn,
+            key_fn=application_key,
+            service_type='application',
+            concurrency=args.concurrency,
+        )
+        argocd_utils.print_summary(results)
+        argocd_utils.print_trace_summary()
+        if args.results_file:
+            argocd_utils.write_results(args.results_file, results, shard)
+        if state is not None:
+            state.commit(args.service_type, results)
+            state.save()
+        if any(result['outcome'] == 'failed' for result in results):
+            sys.exit(1)
+        if args.wait and (names := changed_application_names(names, results)):
+            if args.backend == 'kubernetes':
+                client = argocd_utils.get_argocd_client(pool_size=args.concurrency)
+            durations = wait_for_applications(client, names, timeout=args.wait_timeout)
+            if None in durations.values():
+                sys.exit(1)
@@ -0,0 +1,56 @@
+import sys
+import json
+import argparse
+from pathlib import Path
+from rich import print
+import utils as argocd_utils
+
+def load_result_files(paths):
+    """Load every --results-file JSON given directly or found under a directory"""
+    files = []
+    for path in map(Path, paths):
+        files += sorted(path.rglob('*.json')) if path.is_dir() else [path]
+    return [(file, json.loads(file.read_text())) for file in files]
+
+def merge_results(result_files):
+    """Combine per-shard results into one run, returning the results and a list of problems"""
+    problems, results, shards, seen = [], [], {}, {}
+    counts = {data['shard_count'] for _, data in result_files}
+    if len(counts) > 1:
+        problems.append(f"result files disagree on the shard count: {sorted(counts)}")
+    for file, data in result_files:
+        shards.setdefault(data['shard_index'], []).append(data['results'])
+        for result in data['results']:
+            key = (result['service_type'], result['service'])
+            if seen.setdefault(key, data['shard_index']) != data['shard_index']:
+                problems.append(f"{result['service_type']} '{result['service']}' was applied by shards {seen[key]} and {data['shard_index']}")
+        results += data['results']
+    if len(counts) == 1 and (missing := sorted(set(range(counts.pop())) - set(shards))):
+        problems.append(f"no results from shard(s) {', '.join(map(str, missing))}")
+    return results, shards, problems
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge the --results-file JSON of sharded ArgoCD runs into one summary")
+    parser.add_argument('paths', nargs='+', help="Result files, or directories searched for *.json result files")
+    parser.add_argument('-o', '--output', help="Write the merged results to this JSON file")
+    args = parser.parse_args()
+
+    result_files = load_result_files(args.paths)
+    if not result_files:
+        print(f"[red] No result files found in:[/red] {' '.join(args.paths)}")
+        sys.exit(1)
+
+    results, shards, problems = merge_results(result_files)
+    for index in sorted(shards):
+        shard_results = [result for results_of_file in shards[index] for result in results_of_file]
+        failed = sum(result['outcome'] in ('failed', 'blocked') for result in shard_results)
+        print(f"🧩 Shard {index}: {len(shard_results)} items{f', [red]{failed} failed[/red]' if failed else ''}")
+    argocd_utils.print_summary(results)
+    for problem in problems:
+        print(f"[bold red] {problem}")
+
+    if args.output:
+        shard_count = max(data['shard_count'] for _, data in result_files)
+        Path(args.output).write_text(json.dumps({'shard_count': shard_count, 'shards': sorted(shards), 'results': results}, indent=2))
+    if problems or any(result['outcome'] in ('failed', 'blocked') for result in results):
+        sys.exit(1)
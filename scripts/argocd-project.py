@@ -1,18 +1,60 @@
 import os
 import sys
 import argparse
-import argocd
+import itertools
 from pathlib import Path
 from rich import print
 import utils as argocd_utils
 
-def project_exists(client, name, **kwargs):
-    try:
-        _ = client.projects.project_service_get(name, **kwargs)
+def project_exists(live_state, name):
+    if name in live_state:
         return True
-    except argocd.rest.ApiException:
-        print('[yellow] Project not found!')
-        return False
+    argocd_utils.report_console.print('[yellow] Project not found!')
+    return False
+
+def project_key(body):
+    return body['metadata']['name']
+
+def load_live_state(client, payloads):
+    return argocd_utils.LiveState.load(client, 'projects')
+
+def apply_project(client, live_state, proj, body, force=False):
+    _method = body.pop('method')
+    is_upsert = body.pop('upsert', False)
+    body = argocd_utils.stamp_fingerprint(body)
+    name = body['metadata']['name']
+    
+    proj_exists = project_exists(live_state, name)
+    if (resolved := argocd_utils.resolve_method(_method, proj_exists)) is None:
+        return None
+    if resolved != _method:
+        argocd_utils.report_console.print(f"[yellow] Project '{name}' {'exists' if proj_exists else 'not found'}, switching '{_method}' to '{resolved}'")
+        _method = resolved
+    
+    if _method == 'update' and not force and argocd_utils.is_unchanged(body, live_state.get(name)):
+        return argocd_utils.UNCHANGED
+    
+    project = body
+    body = {'project': project, 'upsert': is_upsert}
+    if _method == "create":
+        res = client.projects.project_service_create(body=body, _return_http_data_only=False)
+        live_state.set(name, project)
+        return res
+    elif _method == "update":
+        res = client.projects.project_service_update(name, body=body, _return_http_data_only=False)
+        live_state.set(name, project)
+        return res
+    elif _method == "delete":
+        res = client.projects.project_service_delete(name, _return_http_data_only=False)
+        live_state.discard(name)
+        return res
+    raise ValueError(f'Invalid method name passed: {_method}')
+
+def apply_project_resource(backend, live_state, proj, body, force=False):
+    """Apply a project as an AppProject custom resource through the Kubernetes API"""
+    _method = body.pop('method')
+    body.pop('upsert', None)
+    return backend.apply('projects', live_state, body, _method, force=force)
     
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Argo CD Application service operations")
@@ -24,7 +66,21 @@ if __name__ == "__main__":
     
     parser.add_argument("-u", "--username", help="ArgoCD username", required=False)
     parser.add_argument("-p", "--password", help="ArgoCD password", required=False)
+    parser.add_argument("--force", help="Send updates even when the live object already matches the payload", action='store_true')
+    parser.add_argument("--incremental", help="Only apply services whose meta entry or YAML changed since the last successful apply", action='store_true')
+    parser.add_argument("--state-file", help="Incremental state file of service content hashes", default=argocd_utils.DEFAULT_STATE_FILE)
+    parser.add_argument("--base-ref", help="Detect incremental changes with git diff against this ref instead of the state file")
+    parser.add_argument("-c", "--concurrency", help="Maximum number of concurrent ArgoCD API calls", type=int, default=argocd_utils.DEFAULT_CONCURRENCY)
+    parser.add_argument("--backend", help="Apply through the ArgoCD API or as custom resources with Kubernetes server-side apply", choices=["argocd", "kubernetes"], default="argocd")
+    parser.add_argument("--trace-file", help="Append timing spans to this JSON-lines file", default=argocd_utils.TRACE_FILE)
+    parser.add_argument("--shard-index", help="Shard of the services this runner applies, from 0", type=int, default=0)
+    parser.add_argument("--shard-count", help="Number of runners the services are split across by a hash of their name", type=int, default=1)
+    parser.add_argument("--results-file", help="Write the reconcile results as JSON, see argocd-merge-results.py")
     args = parser.parse_args()
+    argocd_utils.tracer.configure(args.trace_file)
+    if not 0 <= args.shard_index < args.shard_count:
+        parser.error("--shard-index must be at least 0 and below --shard-count")
+    shard = (args.shard_index, args.shard_count) if args.shard_count > 1 else None
     
     if args.host_url:
         os.environ["ARGOCD_URL"] = args.host_url
@@ -37,29 +93,41 @@ if __name__ == "__main__":
         
     if args.config_file:
         meta_yaml_file = Path(args.config_file)
-        payloads = argocd_utils.prepare_payload_data(meta_yaml_file, service_type=args.service_type)
-        if not payloads:
+        state = argocd_utils.ManifestState(args.state_file, base_ref=args.base_ref) if args.incremental else None
+        payloads = argocd_utils.stream_payload_data(meta_yaml_file, service_type=args.service_type, state=state, shard=shard)
+        # The first payload decides whether there is anything to do; the rest keep rendering meanwhile
+        if (first := next(payloads, None)) is not None:
+            payloads = itertools.chain([first], payloads)
+        if first is None and (state is not None or shard is not None):
+            print("[green] No manifest changes since the last apply" if state is not None else f"[green] No services in shard {args.shard_index}/{args.shard_count}")
+            if args.results_file:
+                argocd_utils.write_results(args.results_file, [], shard)
+            sys.exit(0)
+        if first is None:
             print(f"[red] Failed to load config file:[/red] {args.config_file} \n[yellow] Reason: No projects enabled![/yellow]")
             sys.exit(0)
             
-        client = argocd_utils.get_argocd_client()
-        res = None
-        for proj, body in payloads.items():
-            _method = body.pop('method')
-            is_upsert = body.pop('upsert', False)
-            
-            proj_exists = project_exists(client, body['metadata']['name']) 
-            if not proj_exists and _method == 'delete':
-                argocd_utils.dynamic_width_print()
-                continue
-            
-            body = {'project': body, 'upsert': is_upsert}
-            if _method == "create":
-                res = client.projects.project_service_create(body=body, _return_http_data_only=False)
-            elif _method == "update":
-                res = client.projects.project_service_update(body['project']['metadata']['name'], body=body, _return_http_data_only=False)
-            elif _method == "delete":
-                res = client.projects.project_service_delete(body['project']['metadata']['name'], _return_http_data_only=False)
-        
-            argocd_utils.print_response(res, method=_method, service_name=proj, service_type='project')
-                
+        if args.backend == 'kubernetes':
+            backend = argocd_utils.KubernetesBackend(pool_size=args.concurrency)
+            live_state = backend.load_live_state('projects')
+            apply_fn = lambda proj, body: apply_project_resource(backend, live_state, proj, body, force=args.force)
+        else:
+            client = argocd_utils.get_argocd_client(pool_size=args.concurrency)
+            live_state = load_live_state(client, payloads)
+            apply_fn = lambda proj, body: apply_project(client, live_state, proj, body, force=args.force)
+        results = argocd_utils.reconcile(
+            payloads,
+            apply_fn=apply_fn,
+            key_fn=project_key,
+            service_type='project',
+            concurrency=args.concurrency,
+        )
+        argocd_utils.print_summary(results)
+        argocd_utils.print_trace_summary()
+        if args.results_file:
+            argocd_utils.write_results(args.results_file, results, shard)
+        if state is not None:
+            state.commit(args.service_type, results)
+            state.save()
+        if any(result['outcome'] == 'failed' for result in results):
+            sys.exit(1)
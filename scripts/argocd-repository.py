@@ -1,28 +1,81 @@
 import os
 import sys
 import argparse
-import argocd
 from pathlib import Path
-import time
 from rich import print
 import utils as argocd_utils
 
+# Credential fields are redacted by the list endpoint, so they can never be compared
+CREDENTIAL_FIELDS = {
+    'password', 'sshPrivateKey', 'tlsClientCertData', 'tlsClientCertKey',
+    'githubAppPrivateKey', 'gcpServiceAccountKey', 'bearerToken',
+}
+
 def filter_query_params(query_params, method):
     if method == 'create':
         allowed_params = {'upsert', 'creds_only'}
     elif method == 'delete':
         allowed_params = {'force_refresh', 'app_project'}
-    # elif method == 'update':              # No query params in schema
-    #     allowed_params = {}
+    else:                                   # No query params in schema for update
+        allowed_params = set()
     return {k: v for k, v in query_params.items() if k in allowed_params}
 
-def repository_exists(client, name, **kwargs):
-    try:
-        _ = client.repos.repository_service_get(name)
+def repository_exists(live_state, name):
+    if name in live_state:
         return True
-    except argocd.rest.ApiException:
-        print('[yellow] Repository not found!')
-        return False
+    argocd_utils.report_console.print('[yellow] Repository not found!')
+    return False
+
+def load_live_state(client, payloads):
+    """Index live repositories, including write repositories only when needed"""
+    live_state = {'read': argocd_utils.LiveState.load(client, 'repositories')}
+    if any(body.get('permission') == 'write' for body in payloads.values()):
+        live_state['write'] = argocd_utils.LiveState.load(client, 'write-repositories')
+    return live_state
+
+def repository_key(body):
+    return body['spec']['repo']
+
+def apply_repository(client, live_state, repo, body, force=False):
+    _method = body.pop('method')
+    query_params = body.pop('query_params', {})
+    url = body['spec']['repo']
+    index = live_state['write' if body["permission"] == "write" else 'read']
+    
+    repo_exists = repository_exists(index, url)
+    if (resolved := argocd_utils.resolve_method(_method, repo_exists)) is None:
+        return None
+    if resolved != _method:
+        argocd_utils.report_console.print(f"[yellow] Repository '{url}' {'exists' if repo_exists else 'not found'}, switching '{_method}' to '{resolved}'")
+        _method = resolved
+    
+    has_credentials = any(body['spec'].get(field) for field in CREDENTIAL_FIELDS)
+    if _method == 'update' and not force and not has_credentials and argocd_utils.is_unchanged(body['spec'], index.get(url)):
+        return argocd_utils.UNCHANGED
+    
+    query_params = filter_query_params(query_params=query_params, method=_method)
+    if _method == "create":
+        if body["permission"] == "write":
+            res = client.repos.repository_service_create_write_repository(body=body["spec"], _return_http_data_only=False, **query_params)
+        else:
+            res = client.repos.repository_service_create_repository(body=body["spec"], _return_http_data_only=False, **query_params)
+        index.set(url, body["spec"])
+        return res
+    elif _method == "update":
+        if body["permission"] == "write":
+            res = client.repos.repository_service_update_write_repository(url, body=body["spec"], _return_http_data_only=False, **query_params)
+        else:
+            res = client.repos.repository_service_update_repository(url, body=body["spec"], _return_http_data_only=False, **query_params)
+        index.set(url, body["spec"])
+        return res
+    elif _method == "delete":
+        if body["permission"] == "write":
+            res = client.repos.repository_service_delete_write_repository(url, _return_http_data_only=False, **query_params)
+        else:
+            res = client.repos.repository_service_delete_repository(url, _return_http_data_only=False, **query_params)
+        index.discard(url)
+        return res
+    raise ValueError(f'Invalid method name passed: {_method}')
     
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Argo CD Repository service operations")
@@ -33,7 +86,20 @@ if __name__ == "__main__":
     parser.add_argument('-s', '--service-type', help="Name of the directory to be used for repository services", default='repositories')
     parser.add_argument("-u", "--username", help="ArgoCD username", required=False)
     parser.add_argument("-p", "--password", help="ArgoCD password", required=False)
+    parser.add_argument("--force", help="Send updates even when the live object already matches the payload", action='store_true')
+    parser.add_argument("--incremental", help="Only apply services whose meta entry or YAML changed since the last successful apply", action='store_true')
+    parser.add_argument("--state-file", help="Incremental state file of service content hashes", default=argocd_utils.DEFAULT_STATE_FILE)
+    parser.add_argument("--base-ref", help="Detect incremental changes with git diff against this ref instead of the state file")
+    parser.add_argument("-c", "--concurrency", help="Maximum number of concurrent ArgoCD API calls", type=int, default=argocd_utils.DEFAULT_CONCURRENCY)
+    parser.add_argument("--trace-file", help="Append timing spans to this JSON-lines file", default=argocd_utils.TRACE_FILE)
+    parser.add_argument("--shard-index", help="Shard of the services this runner applies, from 0", type=int, default=0)
+    parser.add_argument("--shard-count", help="Number of runners the services are split across by a hash of their name", type=int, default=1)
+    parser.add_argument("--results-file", help="Write the reconcile results as JSON, see argocd-merge-results.py")
     args = parser.parse_args()
+    argocd_utils.tracer.configure(args.trace_file)
+    if not 0 <= args.shard_index < args.shard_count:
+        parser.error("--shard-index must be at least 0 and below --shard-count")
+    shard = (args.shard_index, args.shard_count) if args.shard_count > 1 else None
 
     if args.host_url:
         os.environ["ARGOCD_URL"] = args.host_url
@@ -46,47 +112,32 @@ if __name__ == "__main__":
 
     if args.config_file:
         meta_yaml_file = Path(args.config_file)
-        payloads = argocd_utils.prepare_payload_data(meta_yaml_file, service_type=args.service_type)
+        state = argocd_utils.ManifestState(args.state_file, base_ref=args.base_ref) if args.incremental else None
+        payloads = argocd_utils.prepare_payload_data(meta_yaml_file, service_type=args.service_type, state=state, shard=shard)
+        if not payloads and (state is not None or shard is not None):
+            print("[green] No manifest changes since the last apply" if state is not None else f"[green] No services in shard {args.shard_index}/{args.shard_count}")
+            if args.results_file:
+                argocd_utils.write_results(args.results_file, [], shard)
+            sys.exit(0)
         if not payloads:
             print(f"[red] Failed to load config file:[/red] {args.config_file} \n[yellow] Reason: No repositories enabled![/yellow]")
             sys.exit(0)
         
-        client = argocd_utils.get_argocd_client()
-        res = None
-        for repo, body in payloads.items():
-            _method = body.pop('method')
-            query_params = body.pop('query_params', {})
-            
-            repo_exists = repository_exists(client, body['spec']['repo']) 
-            if not repo_exists and _method == 'delete':
-                argocd_utils.dynamic_width_print()
-                continue
-            
-            query_params = filter_query_params(query_params=query_params, method=_method)
-            if _method == "create":
-                if body["permission"] == "write":
-                    res = client.repos.repository_service_create_write_repository(body=body["spec"], _return_http_data_only=False, **query_params)
-                else:
-                    res = client.repos.repository_service_create_repository(body=body["spec"], _return_http_data_only=False, **query_params)
-            elif _method == "update":
-                if body["permission"] == "write":
-                    res = client.repos.repository_service_update_write_repository(body['spec']['repo'], body=body["spec"], _return_http_data_only=False, **query_params)
-                else:
-                    res = client.repos.repository_service_update_repository(body['spec']['repo'], body=body["spec"], _return_http_data_only=False, **query_params)
-
-            elif _method == "delete":
-                if body["permission"] == "write":
-                    res = client.repos.repository_service_delete_write_repository(body['spec']['repo'], _return_http_data_only=False, **query_params)
-                else:
-                    res = client.repos.repository_service_delete_repository(body['spec']['repo'], _return_http_data_only=False, **query_params)
-            # Check if the request was successful
-
-            argocd_utils.print_response(res, method=_method, service_name=repo, service_type='repository')
-            time.sleep(2)
-            
-    
-
-
-
-
-
+        client = argocd_utils.get_argocd_client(pool_size=args.concurrency)
+        live_state = load_live_state(client, payloads)
+        results = argocd_utils.reconcile(
+            payloads,
+            apply_fn=lambda repo, body: apply_repository(client, live_state, repo, body, force=args.force),
+            key_fn=repository_key,
+            service_type='repository',
+            concurrency=args.concurrency,
+        )
+        argocd_utils.print_summary(results)
+        argocd_utils.print_trace_summary()
+        if args.results_file:
+            argocd_utils.write_results(args.results_file, results, shard)
+        if state is not None:
+            state.commit(args.service_type, results)
+            state.save()
+        if any(result['outcome'] == 'failed' for result in results):
+            sys.exit(1)
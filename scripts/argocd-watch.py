@@ -0,0 +1,260 @@
+import os
+import sys
+import time
+import errno
+import select
+import signal
+import struct
+import argparse
+import importlib
+import threading
+import ctypes
+import ctypes.util
+from pathlib import Path
+from rich import print
+import utils as argocd_utils
+
+argocd_all = importlib.import_module('argocd-all')
+
+# inotify(7) event masks
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+MANIFEST_SUFFIXES = {'.yaml', '.yml'}
+DEFAULT_DEBOUNCE = 2.0
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_RETRY_INTERVAL = 60
+DEFAULT_SECRET_TTL = 3600
+
+def _ignored(path):
+    return '.git' in path.parts
+
+class InotifyWatcher:
+    """Recursive inotify watch of a directory tree through libc"""
+    def __init__(self, root):
+        self.root = Path(root)
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        self.directories = {}
+        self._watch_tree(self.root)
+
+    def _watch_tree(self, directory):
+        for current, subdirs, _ in os.walk(directory):
+            subdirs[:] = [d for d in subdirs if d != '.git']
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(current), WATCH_MASK)
+            if wd < 0:
+                if ctypes.get_errno() in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch {current}: {os.strerror(ctypes.get_errno())}")
+            self.directories[wd] = Path(current)
+
+    def poll(self, timeout):
+        """Return the paths changed within ``timeout`` seconds; the root itself means everything"""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+                offset += EVENT_HEADER.size + length
+                if mask & IN_Q_OVERFLOW:
+                    changed.add(self.root)
+                    continue
+                directory = self.directories.get(wd)
+                if mask & IN_IGNORED:
+                    self.directories.pop(wd, None)
+                    continue
+                if directory is None:
+                    continue
+                path = directory / os.fsdecode(name) if name else directory
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self._watch_tree(path)
+                changed.add(path)
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Detects changes by comparing file modification times and sizes"""
+    def __init__(self, root, interval=DEFAULT_POLL_INTERVAL):
+        self.root = Path(root)
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for current, subdirs, files in os.walk(self.root):
+            subdirs[:] = [d for d in subdirs if d != '.git']
+            for name in files:
+                path = Path(current) / name
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = {path for path in snapshot.keys() | self.snapshot.keys() if snapshot.get(path) != self.snapshot.get(path)}
+        self.snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+def create_watcher(root, polling=False, interval=DEFAULT_POLL_INTERVAL):
+    """Prefer inotify and fall back to polling where it is unavailable"""
+    if not polling and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as e:
+            print(f"[yellow] inotify unavailable ({e}), polling every {interval}s")
+    return PollingWatcher(root, interval)
+
+def affected_service_dirs(config_dir, paths):
+    """Map changed paths to the service directories whose payloads they feed; None means all"""
+    meta_files = {meta_file: service_dir for meta_file, service_dir, _, _ in argocd_all.SERVICES}
+    service_dirs = set()
+    for path in paths:
+        if _ignored(path):
+            continue
+        try:
+            parts = path.relative_to(config_dir).parts
+        except ValueError:
+            return None
+        if not parts:
+            return None
+        if len(parts) == 1 and parts[0] in meta_files:
+            service_dirs.add(meta_files[parts[0]])
+        elif parts[0] in meta_files.values():
+            if len(parts) == 1 or Path(parts[-1]).suffix in MANIFEST_SUFFIXES:
+                service_dirs.add(parts[0])
+        elif Path(parts[-1]).suffix in MANIFEST_SUFFIXES:
+            return None
+    return service_dirs
+
+def wait_for_changes(watcher, config_dir, stop, timeout=None, debounce=DEFAULT_DEBOUNCE):
+    """Block until manifests change, then until they settle for ``debounce`` seconds.
+
+    Returns the affected service directories (None means all of them), or an
+    empty set when ``timeout`` passed or the daemon is stopping.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    changed = set()
+    while not stop.is_set():
+        remaining = 1.0 if deadline is None else min(1.0, deadline - time.monotonic())
+        if remaining <= 0:
+            return set()
+        changed = watcher.poll(remaining)
+        if changed and affected_service_dirs(config_dir, changed) != set():
+            break
+    else:
+        return set()
+
+    # Bursts like a git pull touch many files; apply once they have settled
+    settle_deadline = time.monotonic() + debounce * 10
+    while not stop.is_set() and time.monotonic() < settle_deadline:
+        if not (more := watcher.poll(debounce)):
+            break
+        changed |= more
+    return affected_service_dirs(config_dir, changed)
+
+def run_pass(client, config_dir, state, service_dirs=None, force=False, concurrency=argocd_utils.DEFAULT_CONCURRENCY):
+    """Apply the changed services of ``service_dirs`` and return True when all of them succeeded"""
+    services = argocd_all.load_services(config_dir, state=state, service_dirs=service_dirs)
+    if not any(payloads for _, payloads in services.values()):
+        print("[green] No manifest changes since the last apply")
+        return True
+    results = argocd_all.apply_services(client, services, force=force, concurrency=concurrency)
+    argocd_utils.print_summary(results)
+    argocd_all.commit_state(state, results)
+    return not any(result['outcome'] in ('failed', 'blocked') for result in results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch an Argo CD config directory and apply changed services as they change")
+    parser.add_argument('-l', '--host-url', help="Hosted ArgoCD App URL",)
+    parser.add_argument('-t', '--token', help="ArgoCD user account OAuth token with project, repository and applications permissions", required=False)
+    parser.add_argument('--verify-ssl', choices=["true", "false"], help="Verify the ArgoCD server certificate", type=str)
+    parser.add_argument('-d', '--config-dir', help="Directory holding project.yaml, repository.yaml and application.yaml", required=True)
+    parser.add_argument("--force", help="Send updates even when the live object already matches the payload", action='store_true')
+    parser.add_argument("--state-file", help="Incremental state file of service content hashes", default=argocd_utils.DEFAULT_STATE_FILE)
+    parser.add_argument("--debounce", help="Seconds without further changes before applying", type=float, default=DEFAULT_DEBOUNCE)
+    parser.add_argument("--poll", help="Poll for changes instead of using inotify", action='store_true')
+    parser.add_argument("--poll-interval", help="Seconds between scans when polling", type=float, default=DEFAULT_POLL_INTERVAL)
+    parser.add_argument("--retry-interval", help="Seconds before services that failed are retried", type=float, default=DEFAULT_RETRY_INTERVAL)
+    parser.add_argument("--secret-ttl", help="Seconds Key Vault secret values are reused before being fetched again", type=float, default=DEFAULT_SECRET_TTL)
+    parser.add_argument("-c", "--concurrency", help="Maximum number of concurrent ArgoCD API calls", type=int, default=argocd_utils.DEFAULT_CONCURRENCY)
+    parser.add_argument("--trace-file", help="Append timing spans to this JSON-lines file", default=argocd_utils.TRACE_FILE)
+    args = parser.parse_args()
+    argocd_utils.tracer.configure(args.trace_file)
+
+    if args.host_url:
+        os.environ["ARGOCD_URL"] = args.host_url
+
+    if args.token:
+        os.environ["ARGOCD_AUTH_TOKEN"] = args.token
+
+    if args.verify_ssl:
+        os.environ["ARGOCD_VERIFY_SSL"] = args.verify_ssl
+
+    config_dir = Path(args.config_dir).resolve()
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    # The client, its session token and the vault clients stay warm between passes
+    client = argocd_utils.get_argocd_client(pool_size=args.concurrency)
+    state = argocd_utils.ManifestState(args.state_file)
+    watcher = create_watcher(config_dir, polling=args.poll, interval=args.poll_interval)
+    print(f"👀 Watching [bright_cyan]{config_dir}[/bright_cyan] with {type(watcher).__name__}")
+
+    service_dirs, secrets_fetched = None, time.monotonic()
+    try:
+        while not stop.is_set():
+            if time.monotonic() - secrets_fetched > args.secret_ttl:
+                argocd_utils.vault_cache.clear()
+                secrets_fetched = time.monotonic()
+            started = time.monotonic()
+            try:
+                succeeded = run_pass(client, config_dir, state, service_dirs, force=args.force, concurrency=args.concurrency)
+            except Exception as e:
+                print(f"[bold red] Apply pass failed:[/bold red] {e}")
+                succeeded = False
+            print(f"⏱️ Pass finished in {time.monotonic() - started:.2f}s, waiting for changes...")
+
+            # Failed services are not recorded in the state, so a later pass over everything retries them
+            service_dirs = wait_for_changes(watcher, config_dir, stop, timeout=None if succeeded else args.retry_interval, debounce=args.debounce)
+            if stop.is_set():
+                break
+            if not succeeded:
+                service_dirs = None
+            if service_dirs is not None:
+                print(f"🔄 Changes detected in: {', '.join(sorted(service_dirs))}")
+            else:
+                print("🔄 Re-applying all services")
+    finally:
+        watcher.close()
+        argocd_utils.print_trace_summary()
+    print("👋 Watch stopped")
@@ -1,45 +1,216 @@
 import requests
+import requests.adapters
 import json
 import os
-from azure.identity import DefaultAzureCredential
-from azure.mgmt.grafana import GrafanaManagementClient
-
-def setup_grafana_dashboards():
-    """Setup Grafana dashboards and datasources"""
-    
-    subscription_id = os.environ.get('ARM_SUBSCRIPTION_ID')
-    resource_group = os.environ.get('RESOURCE_GROUP')
-    
-    # Initialize Azure clients
-    credential = DefaultAzureCredential()
-    grafana_client = GrafanaManagementClient(credential, subscription_id)
-    
-    # Get Grafana workspaces
-    workspaces = grafana_client.grafana.list_by_resource_group(resource_group)
-    
-    for workspace in workspaces:
+import sys
+import argparse
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from rich import print
+
+# Azure Managed Grafana's application id, used as the token audience for its HTTP API
+AZURE_GRAFANA_SCOPE = 'ce34e7e5-485f-4d76-964f-b3d2b16d1e4f/.default'
+DASHBOARDS_BASE_URL = os.environ.get('GRAFANA_DASHBOARDS_URL', 'https://grafana.com')
+DASHBOARD_CACHE_DIR = os.environ.get('GRAFANA_DASHBOARD_CACHE', Path.home() / '.cache' / 'terraform-workflows' / 'grafana-dashboards')
+DEFAULT_CONCURRENCY = int(os.environ.get('GRAFANA_CONCURRENCY', 8))
+
+# Common AKS monitoring dashboards to import: (name, grafana.com id, revision)
+DASHBOARDS = [
+    ("AKS Cluster Overview", 8588, 1),
+    ("Kubernetes Pod Monitoring", 6417, 1),
+    ("ArgoCD Overview", 14584, 1),
+]
+
+# Top-level dashboard field recording the digest of the artifact a dashboard was imported from
+DIGEST_FIELD = 'provisionedDigest'
+
+def dashboard_url(gnet_id, revision, base_url=DASHBOARDS_BASE_URL):
+    return f"{base_url.rstrip('/')}/api/dashboards/{gnet_id}/revisions/{revision}/download"
+
+class DashboardCache:
+    """Content-addressed store of downloaded dashboard JSON, revalidated with ETags.
+
+    Blobs are stored by SHA-256 and ``index.json`` maps each URL to its blob
+    and validators. A URL is revalidated once per run; concurrent requests for
+    the same URL share that single download.
+    """
+    def __init__(self, cache_dir=DASHBOARD_CACHE_DIR, session=None):
+        self.cache_dir = Path(cache_dir)
+        self.session = session or requests.Session()
+        self._fetched = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _index(self):
+        try:
+            return json.loads((self.cache_dir / 'index.json').read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, path, data):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def _blob(self, digest):
+        try:
+            return (self.cache_dir / 'blobs' / f"{digest}.json").read_bytes()
+        except OSError:
+            return None
+
+    def fetch(self, url):
+        """Return ``(digest, dashboard JSON)`` for a URL, downloading only when it changed"""
+        with self._lock:
+            lock = self._locks.setdefault(url, threading.Lock())
+        with lock:
+            if url in self._fetched:
+                return self._fetched[url]
+            with self._lock:
+                entry = self._index().get(url, {})
+            cached = self._blob(entry['digest']) if entry.get('digest') else None
+            headers = {}
+            if cached is not None:
+                headers = {k: v for k, v in (('If-None-Match', entry.get('etag')), ('If-Modified-Since', entry.get('last_modified'))) if v}
+            response = self.session.get(url, headers=headers, timeout=60)
+            if response.status_code == 304 and cached is not None:
+                print(f"♻️ Dashboard unchanged, using cache: {url}")
+                data, digest = cached, entry['digest']
+            else:
+                response.raise_for_status()
+                data = response.content
+                digest = hashlib.sha256(data).hexdigest()
+                self._write(self.cache_dir / 'blobs' / f"{digest}.json", data)
+                with self._lock:
+                    index = self._index()
+                    index[url] = {'digest': digest, 'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+                    self._write(self.cache_dir / 'index.json', json.dumps(index, indent=2).encode())
+                print(f"⬇️ Downloaded dashboard: {url}")
+            self._fetched[url] = (digest, json.loads(data))
+            return self._fetched[url]
+
+class GrafanaWorkspace:
+    """Grafana HTTP API of one workspace"""
+    def __init__(self, name, endpoint, token, pool_size=DEFAULT_CONCURRENCY):
+        self.name = name
+        self.endpoint = endpoint.rstrip('/')
+        self.session = requests.Session()
+        self.session.headers.update({'Authorization': f"Bearer {token}", 'Accept': 'application/json'})
+        self.session.mount(self.endpoint, requests.adapters.HTTPAdapter(pool_maxsize=pool_size))
+        self._datasources = None
+        self._lock = threading.Lock()
+
+    def request(self, method, path, **kwargs):
+        return self.session.request(method, f"{self.endpoint}{path}", timeout=60, **kwargs)
+
+    def datasources(self):
+        with self._lock:
+            if self._datasources is None:
+                response = self.request('GET', '/api/datasources')
+                response.raise_for_status()
+                self._datasources = response.json()
+            return self._datasources
+
+    def installed_digest(self, uid):
+        """Digest of the artifact the dashboard with this uid was last imported from, if any"""
+        response = self.request('GET', f"/api/dashboards/uid/{uid}")
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json().get('dashboard', {}).get(DIGEST_FIELD)
+
+    def import_inputs(self, dashboard):
+        """Map the dashboard's ``__inputs`` to datasources of the workspace, preferring defaults"""
+        inputs = []
+        for item in dashboard.get('__inputs') or []:
+            if item.get('type') != 'datasource':
+                inputs.append({'name': item['name'], 'type': item.get('type'), 'value': item.get('value', '')})
+                continue
+            candidates = [ds for ds in self.datasources() if ds.get('type') == item.get('pluginId')]
+            if not candidates:
+                raise LookupError(f"no '{item.get('pluginId')}' datasource for input {item['name']}")
+            datasource = next((ds for ds in candidates if ds.get('isDefault')), candidates[0])
+            inputs.append({'name': item['name'], 'type': 'datasource', 'pluginId': item.get('pluginId'), 'value': datasource['uid']})
+        return inputs
+
+    def import_dashboard(self, dashboard, inputs):
+        response = self.request('POST', '/api/dashboards/import', json={'dashboard': dashboard, 'overwrite': True, 'inputs': inputs, 'folderUid': ''})
+        response.raise_for_status()
+        return response
+
+def import_dashboard(workspace, cache, name, gnet_id, revision, force=False):
+    """Import one grafana.com dashboard revision into a workspace unless it already holds it"""
+    try:
+        digest, dashboard = cache.fetch(dashboard_url(gnet_id, revision))
+        # grafana.com exports may have no uid; a stable one keeps imports idempotent
+        uid = dashboard.get('uid') or f"gnet-{gnet_id}"
+        if not force and workspace.installed_digest(uid) == digest:
+            print(f"[dim] {workspace.name}: '{name}' is already at revision {revision}, skipping")
+            return 'unchanged'
+        dashboard = {**dashboard, 'uid': uid, 'id': None, DIGEST_FIELD: digest}
+        workspace.import_dashboard(dashboard, workspace.import_inputs(dashboard))
+        print(f"[bold green] {workspace.name}: imported '[bright_cyan]{name}[/bright_cyan]' (revision {revision})")
+        return 'imported'
+    except (requests.RequestException, LookupError, ValueError) as e:
+        print(f"[bold red] {workspace.name}: failed to import '{name}': {e}")
+        return 'failed'
+
+def azure_credential():
+    from azure.identity import DefaultAzureCredential
+    return DefaultAzureCredential()
+
+def discover_workspaces(credential, subscription_id, resource_group):
+    """Azure Managed Grafana workspaces of a resource group as (name, endpoint) pairs"""
+    from azure.mgmt.dashboard import DashboardManagementClient
+    grafana_client = DashboardManagementClient(credential, subscription_id)
+    workspaces = []
+    for workspace in grafana_client.grafana.list_by_resource_group(resource_group):
         print(f"📊 Found Grafana workspace: {workspace.name}")
         print(f"🌐 Endpoint: {workspace.properties.endpoint}")
-        
-        # Common AKS monitoring dashboards to import
-        dashboards = [
-            {
-                "name": "AKS Cluster Overview", 
-                "url": "https://grafana.com/api/dashboards/8588/revisions/1/download"
-            },
-            {
-                "name": "Kubernetes Pod Monitoring",
-                "url": "https://grafana.com/api/dashboards/6417/revisions/1/download"
-            },
-            {
-                "name": "ArgoCD Overview",
-                "url": "https://grafana.com/api/dashboards/14584/revisions/1/download"
-            }
-        ]
-        
-        print("🎯 Ready to import dashboards:")
-        for dashboard in dashboards:
-            print(f"  - {dashboard['name']}")
+        workspaces.append((workspace.name, workspace.properties.endpoint))
+    return workspaces
+
+def setup_grafana_dashboards(grafana_urls=None, token=None, concurrency=DEFAULT_CONCURRENCY, cache_dir=DASHBOARD_CACHE_DIR, force=False):
+    """Import the dashboards into every Grafana workspace concurrently"""
+    # The Azure SDK is only imported when no endpoint or token is given
+    credential = None
+    if grafana_urls:
+        workspaces = [(url, url) for url in grafana_urls]
+    else:
+        subscription_id = os.environ.get('ARM_SUBSCRIPTION_ID')
+        resource_group = os.environ.get('RESOURCE_GROUP')
+        credential = azure_credential()
+        workspaces = discover_workspaces(credential, subscription_id, resource_group)
+    if not workspaces:
+        print("[yellow]⚠️ No Grafana workspaces found")
+        return {}
+
+    token = token or (credential or azure_credential()).get_token(AZURE_GRAFANA_SCOPE).token
+    workspaces = [GrafanaWorkspace(name, endpoint, token, pool_size=concurrency) for name, endpoint in workspaces]
+    cache = DashboardCache(cache_dir)
+
+    print(f"🎯 Importing {len(DASHBOARDS)} dashboards into {len(workspaces)} workspace(s)...")
+    jobs = [(workspace, dashboard) for workspace in workspaces for dashboard in DASHBOARDS]
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        outcomes = list(executor.map(lambda job: import_dashboard(job[0], cache, *job[1], force=force), jobs))
+
+    counts = {}
+    for outcome in outcomes:
+        counts[outcome] = counts.get(outcome, 0) + 1
+    print(f"[bold] Dashboard summary[/bold] - {', '.join(f'{k}: {v}' for k, v in sorted(counts.items()))}")
+    return counts
 
 if __name__ == "__main__":
-    setup_grafana_dashboards()
+    parser = argparse.ArgumentParser(description="Import AKS monitoring dashboards into Azure Managed Grafana workspaces")
+    parser.add_argument('--grafana-url', action='append', help="Grafana endpoint to use instead of discovering the workspaces of RESOURCE_GROUP (repeatable)")
+    parser.add_argument('--token', help="Grafana API token (defaults to an Azure AD token for Azure Managed Grafana)", default=os.environ.get('GRAFANA_TOKEN'))
+    parser.add_argument('--cache-dir', help="Directory of the downloaded dashboard cache", default=DASHBOARD_CACHE_DIR)
+    parser.add_argument('--force', help="Import even when a workspace already holds the same dashboard revision", action='store_true')
+    parser.add_argument('-c', '--concurrency', help="Maximum number of concurrent imports", type=int, default=DEFAULT_CONCURRENCY)
+    args = parser.parse_args()
+
+    counts = setup_grafana_dashboards(args.grafana_url, args.token, args.concurrency, args.cache_dir, args.force)
+    if counts.get('failed'):
+        sys.exit(1)
@@ -0,0 +1,247 @@
+"""Parse Terraform ``.tfvars`` files into JSON.
+
+Handles the HCL subset allowed in variable files in a single pass: strings
+(escapes and ``${...}`` templates kept verbatim), heredocs (``<<EOF`` and
+indented ``<<-EOF``), numbers, bools, null, and lists / maps spanning multiple
+lines, plus ``#``, ``//`` and ``/* */`` comments. Only uses the standard
+library so composite actions can run it without installing requirements.
+
+    python scripts/tfvars_parser.py terraform-vars/dev.tfvars
+"""
+import re
+import sys
+import json
+import argparse
+from decimal import Decimal
+from pathlib import Path
+
+IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_-]*')
+NUMBER = re.compile(r'-?\d+(\.\d+)?([eE][+-]?\d+)?')
+# Characters that cannot follow a number, such as the x of 0x10
+NUMBER_TAIL = re.compile(r'[A-Za-z0-9_.]*')
+HEREDOC = re.compile(r'<<(-?)([A-Za-z_][A-Za-z0-9_-]*)[ \t]*\r?\n')
+KEYWORDS = {'true': True, 'false': False, 'null': None}
+ESCAPES = {'n': '\n', 'r': '\r', 't': '\t', '"': '"', '\\': '\\'}
+
+class TfvarsSyntaxError(ValueError):
+    pass
+
+class _Parser:
+    def __init__(self, text, source='<tfvars>'):
+        self.text = text
+        self.source = source
+        self.pos = 0
+
+    def error(self, message):
+        line = self.text.count('\n', 0, self.pos) + 1
+        column = self.pos - self.text.rfind('\n', 0, self.pos)
+        raise TfvarsSyntaxError(f"{self.source}:{line}:{column}: {message}")
+
+    def peek(self):
+        return self.text[self.pos] if self.pos < len(self.text) else ''
+
+    def skip(self, newlines=True):
+        """Skip whitespace and comments, and newlines unless they separate items"""
+        text = self.text
+        while self.pos < len(text):
+            char = text[self.pos]
+            if char in ' \t\r' or (newlines and char == '\n'):
+                self.pos += 1
+            elif char == '#' or text.startswith('//', self.pos):
+                end = text.find('\n', self.pos)
+                self.pos = len(text) if end < 0 else end
+            elif text.startswith('/*', self.pos):
+                end = text.find('*/', self.pos + 2)
+                if end < 0:
+                    self.error("unterminated comment")
+                self.pos = end + 2
+            else:
+                return
+
+    def expect(self, chars):
+        if self.peek() not in chars or not self.peek():
+            self.error(f"expected {' or '.join(repr(c) for c in chars)}, found {self.peek()!r}")
+        self.pos += 1
+
+    def parse(self):
+        variables = {}
+        while True:
+            self.skip()
+            if not self.peek():
+                return variables
+            key = self.key()
+            if key in variables:
+                self.error(f"variable '{key}' is defined more than once")
+            self.skip(newlines=False)
+            self.expect('=')
+            self.skip(newlines=False)
+            variables[key] = self.value()
+            self.skip(newlines=False)
+            if self.peek() not in ('\n', ''):
+                self.error(f"expected a newline after '{key}', found {self.peek()!r}")
+
+    def key(self):
+        if self.peek() == '"':
+            return self.string()
+        if not (match := IDENTIFIER.match(self.text, self.pos)):
+            self.error(f"expected a variable name, found {self.peek()!r}")
+        self.pos = match.end()
+        return match.group()
+
+    def value(self):
+        char = self.peek()
+        if char == '"':
+            return self.string()
+        if char == '[':
+            return self.list()
+        if char == '{':
+            return self.object()
+        if self.text.startswith('<<', self.pos):
+            return self.heredoc()
+        if match := NUMBER.match(self.text, self.pos):
+            if (end := NUMBER_TAIL.match(self.text, match.end()).end()) > match.end():
+                self.error(f"invalid number {self.text[self.pos:end]!r}, tfvars numbers are decimal literals")
+            self.pos = match.end()
+            # Like Terraform, whole numbers are integers however they are written (1.5e3 is 1500)
+            number = Decimal(match.group())
+            return int(number) if number == number.to_integral_value() else float(number)
+        if (match := IDENTIFIER.match(self.text, self.pos)) and match.group() in KEYWORDS:
+            self.pos = match.end()
+            return KEYWORDS[match.group()]
+        self.error(f"unsupported value starting with {char!r}, tfvars only allow literals")
+
+    def string(self):
+        text, parts = self.text, []
+        self.pos += 1
+        start = self.pos
+        while True:
+            if self.pos >= len(text) or text[self.pos] == '\n':
+                self.error("unterminated string")
+            char = text[self.pos]
+            if char == '"':
+                parts.append(text[start:self.pos])
+                self.pos += 1
+                return ''.join(parts)
+            if char == '\\':
+                parts.append(text[start:self.pos])
+                parts.append(self.escape())
+                start = self.pos
+            elif char in '$%' and text.startswith(char + char + '{', self.pos):
+                # $${ and %%{ escape a literal ${ and %{
+                parts.append(text[start:self.pos] + char + '{')
+                self.pos += 3
+                start = self.pos
+            elif char in '$%' and text.startswith('{', self.pos + 1):
+                self.template()
+            else:
+                self.pos += 1
+
+    def escape(self):
+        text = self.text
+        code = text[self.pos + 1:self.pos + 2]
+        if code in ESCAPES:
+            self.pos += 2
+            return ESCAPES[code]
+        for prefix, width in (('u', 4), ('U', 8)):
+            if code == prefix and re.fullmatch(r'[0-9A-Fa-f]{%d}' % width, text[self.pos + 2:self.pos + 2 + width]):
+                self.pos += 2 + width
+                return chr(int(text[self.pos - width:self.pos], 16))
+        self.error(f"invalid escape sequence \\{code}")
+
+    def template(self):
+        """Skip a ${...} / %{...} sequence, kept verbatim in the string"""
+        text, depth = self.text, 0
+        self.pos += 1
+        while self.pos < len(text):
+            char = text[self.pos]
+            if char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+                if depth == 0:
+                    self.pos += 1
+                    return
+            elif char == '"':
+                # Quoted strings inside the template may contain braces
+                end = self.pos + 1
+                while end < len(text) and text[end] != '"':
+                    end += 2 if text[end] == '\\' else 1
+                self.pos = end
+            self.pos += 1
+        self.error("unterminated template sequence")
+
+    def heredoc(self):
+        if not (match := HEREDOC.match(self.text, self.pos)):
+            self.error("expected a heredoc marker such as <<EOF followed by a newline")
+        indented, marker = match.group(1), match.group(2)
+        lines, self.pos = [], match.end()
+        while self.pos < len(self.text):
+            end = self.text.find('\n', self.pos)
+            end = len(self.text) if end < 0 else end
+            line = self.text[self.pos:end].rstrip('\r')
+            self.pos = end
+            if line.strip() == marker:
+                break
+            lines.append(line)
+            self.pos += 1
+        else:
+            self.error(f"heredoc is missing its closing '{marker}'")
+        if indented:
+            margin = min((len(line) - len(line.lstrip(' \t')) for line in lines if line.strip()), default=0)
+            lines = [line[margin:] for line in lines]
+        return ''.join(line + '\n' for line in lines)
+
+    def list(self):
+        items = []
+        self.pos += 1
+        while True:
+            self.skip()
+            if self.peek() == ']':
+                self.pos += 1
+                return items
+            items.append(self.value())
+            self.skip()
+            if self.peek() == ',':
+                self.pos += 1
+            elif self.peek() != ']':
+                self.error(f"expected ',' or ']' in list, found {self.peek()!r}")
+
+    def object(self):
+        items = {}
+        self.pos += 1
+        while True:
+            self.skip()
+            if self.peek() == '}':
+                self.pos += 1
+                return items
+            key = self.key()
+            self.skip(newlines=False)
+            self.expect('=:')
+            self.skip()
+            items[key] = self.value()
+            self.skip(newlines=False)
+            if self.peek() == ',':
+                self.pos += 1
+            elif self.peek() not in ('\n', '}'):
+                self.error(f"expected ',', a newline or '}}' in map, found {self.peek()!r}")
+
+def parse_tfvars(text, source='<tfvars>'):
+    """Parse the text of a .tfvars file into a dict of variables"""
+    return _Parser(text, source).parse()
+
+def load_tfvars(file_path):
+    """Parse a .tfvars file"""
+    return parse_tfvars(Path(file_path).read_text(encoding='utf-8-sig'), source=str(file_path))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse a Terraform .tfvars file into JSON")
+    parser.add_argument('file', help="Path to the .tfvars file")
+    parser.add_argument('--indent', help="Pretty-print the JSON with this indent", type=int)
+    args = parser.parse_args()
+
+    try:
+        variables = load_tfvars(args.file)
+    except (OSError, TfvarsSyntaxError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(variables, indent=args.indent, separators=None if args.indent else (',', ':')))
@@ -0,0 +1,49 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / 'scripts'
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+spec = importlib.util.spec_from_file_location('argocd_application', SCRIPTS_DIR / 'argocd-application.py')
+argocd_application = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(argocd_application)
+
+WRITTEN_AT = argocd_application._parse_http_date('Sat, 17 Oct 2026 10:00:00 GMT')
+
+
+def application(resource_version, reconciled_at, sync='Synced', health='Healthy'):
+    return {
+        'metadata': {'name': 'app', 'resourceVersion': resource_version},
+        'status': {'sync': {'status': sync}, 'health': {'status': health}, 'reconciledAt': reconciled_at},
+    }
+
+
+def test_status_reconciled_after_the_write_counts():
+    assert argocd_application.application_converged(application('8', '2026-10-17T10:00:01Z'), '7', WRITTEN_AT)
+
+
+def test_status_reconciled_in_the_second_of_the_write_counts():
+    assert argocd_application.application_converged(application('8', '2026-10-17T10:00:00Z'), '7', WRITTEN_AT)
+
+
+def test_status_reconciled_before_the_write_is_stale():
+    assert not argocd_application.application_converged(application('8', '2026-10-17T09:59:59Z'), '7', WRITTEN_AT)
+
+
+def test_written_object_still_carries_the_previous_status():
+    assert not argocd_application.application_converged(application('7', '2026-10-17T10:00:05Z'), '7', WRITTEN_AT)
+
+
+def test_out_of_sync_application_has_not_converged():
+    assert not argocd_application.application_converged(application('8', '2026-10-17T10:00:05Z', sync='OutOfSync'), '7', WRITTEN_AT)
+
+
+def test_changed_application_names_keeps_the_write_response():
+    results = [
+        {'service': 'svc', 'service_type': 'application', 'method': 'update', 'outcome': 'applied',
+         'resource_version': '7', 'written_at': 'Sat, 17 Oct 2026 10:00:00 GMT'},
+        {'service': 'other', 'service_type': 'application', 'method': 'update', 'outcome': 'unchanged'},
+    ]
+    names = argocd_application.changed_application_names({'svc': 'app', 'other': 'other-app'}, results)
+    assert names == {'app': {'resource_version': '7', 'written_at': 'Sat, 17 Oct 2026 10:00:00 GMT'}}
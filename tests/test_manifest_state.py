@@ -0,0 +1,149 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+import utils as argocd_utils
+
+SERVICE_TYPE = 'applications'
+
+
+class Config:
+    """A meta YAML and its service directory, optionally inside a git repository"""
+    def __init__(self, root):
+        self.root = root
+        self.dir = root / 'configs'
+        (self.dir / SERVICE_TYPE).mkdir(parents=True)
+        self.meta_yaml = self.dir / 'application.yaml'
+        self.services = {}
+
+    def write(self, service, conf=None, namespace='default'):
+        self.services[service] = conf or {'enabled': True, 'method': 'create'}
+        (self.dir / SERVICE_TYPE / f'{service}.yaml').write_text(yaml.safe_dump(
+            {'metadata': {'name': service}, 'spec': {'destination': {'namespace': namespace}}}
+        ))
+        self.save_meta()
+
+    def remove(self, service):
+        del self.services[service]
+        (self.dir / SERVICE_TYPE / f'{service}.yaml').unlink()
+        self.save_meta()
+
+    def save_meta(self):
+        self.meta_yaml.write_text(yaml.safe_dump({SERVICE_TYPE: self.services}))
+
+    def meta(self):
+        return yaml.safe_load(self.meta_yaml.read_text())
+
+    def git(self, *args):
+        return subprocess.run(['git', '-C', str(self.root), *args], capture_output=True, text=True, check=True).stdout.strip()
+
+    def commit(self, message='change'):
+        self.git('add', '-A')
+        self.git('-c', 'user.name=test', '-c', 'user.email=test@example.com', 'commit', '-q', '-m', message)
+        return self.git('rev-parse', 'HEAD')
+
+
+@pytest.fixture
+def config(tmp_path):
+    config = Config(tmp_path)
+    for service in ('app-1', 'app-2', 'app-3'):
+        config.write(service)
+    return config
+
+
+@pytest.fixture
+def repo(config):
+    config.git('init', '-q')
+    config.base = config.commit('base')
+    return config
+
+
+def plan(state, config):
+    return state.plan(config.meta_yaml, SERVICE_TYPE, config.meta())
+
+
+def apply(state, config, failed=()):
+    """Plan, track and commit like a script run where every service but ``failed`` applies"""
+    changed, removed = plan(state, config)
+    payloads = {
+        service: yaml.safe_load((config.dir / SERVICE_TYPE / f'{service}.yaml').read_text())
+        for service in changed
+    }
+    state.track(SERVICE_TYPE, payloads)
+    results = [{'service': service, 'outcome': 'failed' if service in failed else 'applied'} for service in [*changed, *removed]]
+    state.commit(SERVICE_TYPE, results)
+    state.save()
+    return changed, removed
+
+
+def test_first_run_applies_everything_and_the_next_nothing(config, tmp_path):
+    state_file = tmp_path / 'state.json'
+    changed, removed = apply(argocd_utils.ManifestState(state_file), config)
+    assert changed == {'app-1', 'app-2', 'app-3'} and removed == {}
+    assert plan(argocd_utils.ManifestState(state_file), config) == (set(), {})
+
+
+def test_changed_yaml_and_meta_entry_are_applied(config, tmp_path):
+    state_file = tmp_path / 'state.json'
+    apply(argocd_utils.ManifestState(state_file), config)
+    config.write('app-1', namespace='other')
+    config.write('app-2', {'enabled': True, 'method': 'update'})
+    config.write('app-4')
+    assert plan(argocd_utils.ManifestState(state_file), config) == ({'app-1', 'app-2', 'app-4'}, {})
+
+
+def test_removed_service_is_deleted_by_its_recorded_identity(config, tmp_path):
+    state_file = tmp_path / 'state.json'
+    apply(argocd_utils.ManifestState(state_file), config)
+    config.remove('app-3')
+    changed, removed = apply(argocd_utils.ManifestState(state_file), config)
+    assert changed == set() and removed == {'app-3': {'metadata': {'name': 'app-3'}}}
+    # Once the delete succeeded it is not planned again
+    assert plan(argocd_utils.ManifestState(state_file), config) == (set(), {})
+
+
+def test_failed_service_is_retried_on_the_next_run(config, tmp_path):
+    state_file = tmp_path / 'state.json'
+    apply(argocd_utils.ManifestState(state_file), config, failed={'app-2'})
+    assert plan(argocd_utils.ManifestState(state_file), config) == ({'app-2'}, {})
+
+
+def test_git_diff_finds_changed_added_and_removed_services(repo):
+    repo.write('app-1', namespace='other')
+    repo.write('app-2', {'enabled': False, 'method': 'create'})
+    repo.write('app-4')
+    repo.remove('app-3')
+    repo.commit()
+    changed, removed = plan(argocd_utils.ManifestState(base_ref=repo.base), repo)
+    assert changed == {'app-1', 'app-2', 'app-4'}
+    assert removed == {'app-3': {'metadata': {'name': 'app-3'}}}
+
+
+def test_git_diff_covers_every_commit_since_the_base(repo):
+    repo.write('app-1', namespace='first')
+    repo.commit('first')
+    repo.write('app-2', namespace='second')
+    repo.commit('second')
+    assert plan(argocd_utils.ManifestState(base_ref=repo.base), repo) == ({'app-1', 'app-2'}, {})
+
+
+def test_git_diff_without_changes_applies_nothing(repo):
+    assert plan(argocd_utils.ManifestState(base_ref=repo.base), repo) == (set(), {})
+
+
+def test_unknown_base_ref_reconciles_every_service(repo):
+    repo.write('app-1', namespace='other')
+    repo.commit()
+    changed, removed = plan(argocd_utils.ManifestState(base_ref='0' * 40), repo)
+    assert changed == {'app-1', 'app-2', 'app-3'} and removed == {}
+
+
+def test_config_outside_a_git_repository_reconciles_every_service(config, monkeypatch):
+    monkeypatch.setenv('GIT_CEILING_DIRECTORIES', str(config.root.parent))
+    changed, removed = plan(argocd_utils.ManifestState(base_ref='HEAD~1'), config)
+    assert changed == {'app-1', 'app-2', 'app-3'} and removed == {}
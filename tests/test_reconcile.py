@@ -0,0 +1,118 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+import utils as argocd_utils
+
+OK = ({}, 200, {})
+
+
+class Recorder:
+    """apply_fn that records the start and end of each call and fails the given services"""
+    def __init__(self, fail=(), delay=0.0):
+        self.fail = set(fail)
+        self.delay = delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, service, body):
+        with self.lock:
+            self.calls.append(('start', service, body['method']))
+        time.sleep(self.delay)
+        with self.lock:
+            self.calls.append(('end', service, body['method']))
+        if service in self.fail:
+            raise RuntimeError(f"{service} failed")
+        return OK
+
+    def started(self):
+        return [service for event, service, _ in self.calls if event == 'start']
+
+
+def outcomes(results):
+    return {result['service']: result['outcome'] for result in results}
+
+
+def test_items_sharing_a_key_run_in_config_order():
+    payloads = {
+        'old-name': {'name': 'app', 'method': 'delete'},
+        'other': {'name': 'other', 'method': 'create'},
+        'new-name': {'name': 'app', 'method': 'create'},
+    }
+    recorder = Recorder(delay=0.05)
+    results = argocd_utils.reconcile(payloads, recorder, key_fn=lambda body: body['name'], concurrency=4)
+    assert outcomes(results) == {'old-name': 'applied', 'other': 'applied', 'new-name': 'applied'}
+    calls = recorder.calls
+    assert calls.index(('end', 'old-name', 'delete')) < calls.index(('start', 'new-name', 'create'))
+    # Unrelated items do not wait for the chain
+    assert calls.index(('start', 'other', 'create')) < calls.index(('end', 'old-name', 'delete'))
+
+
+def test_failed_dependency_blocks_its_dependents():
+    apply_fn = recorder = Recorder(fail={'project'})
+    nodes = [
+        {'service': 'project', 'service_type': 'project', 'method': 'create', 'body': {'method': 'create'}, 'apply_fn': apply_fn, 'deps': set()},
+        {'service': 'app', 'service_type': 'application', 'method': 'create', 'body': {'method': 'create'}, 'apply_fn': apply_fn, 'deps': {0}},
+        {'service': 'app-rename', 'service_type': 'application', 'method': 'update', 'body': {'method': 'update'}, 'apply_fn': apply_fn, 'deps': {1}},
+        {'service': 'unrelated', 'service_type': 'application', 'method': 'create', 'body': {'method': 'create'}, 'apply_fn': apply_fn, 'deps': set()},
+    ]
+    results = argocd_utils.run_graph(nodes, concurrency=2)
+    assert outcomes(results) == {'project': 'failed', 'app': 'blocked', 'app-rename': 'blocked', 'unrelated': 'applied'}
+    assert sorted(recorder.started()) == ['project', 'unrelated']
+
+
+def test_failure_in_a_chain_blocks_the_rest_of_the_chain():
+    payloads = [('first', {'name': 'app', 'method': 'delete'}), ('second', {'name': 'app', 'method': 'create'})]
+    recorder = Recorder(fail={'first'})
+    results = argocd_utils.reconcile(payloads, recorder, key_fn=lambda body: body['name'])
+    assert outcomes(results) == {'first': 'failed', 'second': 'blocked'}
+    assert recorder.started() == ['first']
+
+
+def test_stream_is_pulled_with_backpressure():
+    concurrency, pulled, finished = 2, [], []
+    def stream():
+        for index in range(50):
+            pulled.append(index)
+            # Never more than twice the worker count is pulled ahead of the finished nodes
+            assert len(pulled) - len(finished) <= concurrency * 2
+            yield f'svc-{index}', {'name': f'svc-{index}', 'method': 'create'}
+    def apply_fn(service, body):
+        time.sleep(0.001)
+        finished.append(service)
+        return OK
+    results = argocd_utils.reconcile(stream(), apply_fn, key_fn=lambda body: body['name'], concurrency=concurrency)
+    assert len(results) == 50 and set(outcomes(results).values()) == {'applied'}
+
+
+def test_render_error_mid_stream_fails_only_that_service(tmp_path, monkeypatch):
+    monkeypatch.setattr(argocd_utils, 'manifest_cache', argocd_utils.ManifestCache(None))
+    (tmp_path / 'applications').mkdir()
+    services = [f'app-{index}' for index in range(5)]
+    for service in services:
+        (tmp_path / 'applications' / f'{service}.yaml').write_text(yaml.safe_dump({'metadata': {'name': service}}))
+    (tmp_path / 'applications' / 'app-2.yaml').write_text('metadata: {name: [unclosed\n')
+    meta_yaml = tmp_path / 'application.yaml'
+    meta_yaml.write_text(yaml.safe_dump({'applications': {service: {'enabled': True, 'method': 'create'} for service in services}}))
+
+    recorder = Recorder()
+    stream = argocd_utils.stream_payload_data(meta_yaml, 'applications', concurrency=2, buffer_size=2)
+    results = argocd_utils.reconcile(stream, recorder, key_fn=lambda body: body['metadata']['name'], service_type='application')
+
+    assert outcomes(results) == {'app-0': 'applied', 'app-1': 'applied', 'app-2': 'failed', 'app-3': 'applied', 'app-4': 'applied'}
+    assert sorted(recorder.started()) == ['app-0', 'app-1', 'app-3', 'app-4']
+    assert next(result for result in results if result['service'] == 'app-2')['status'] == 500
+
+
+def test_render_error_is_raised_from_its_node():
+    error = ValueError('bad manifest')
+    node, = argocd_utils.iter_nodes([('svc', {'method': 'create', argocd_utils.RENDER_ERROR: error})], None, key_fn=None)
+    assert node['deps'] == set() and node['key'] is None
+    with pytest.raises(ValueError, match='bad manifest'):
+        node['apply_fn'](node['service'], node['body'])
@@ -0,0 +1,98 @@
+import importlib.util
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / 'scripts'
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import utils as argocd_utils
+
+
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), SCRIPTS_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+argocd_all = load_script('argocd-all')
+merge_results = load_script('argocd-merge-results')
+
+KEYS = [f'app-{index}' for index in range(2000)]
+
+
+def test_shard_assignment_is_stable():
+    # Pinned so a change of hash or key format, which would move every service, fails here
+    assert {key: argocd_utils.shard_of(key, 4) for key in ('app-0', 'app-1', 'payments', 'proj-0')} == {
+        'app-0': 1, 'app-1': 2, 'payments': 3, 'proj-0': 2,
+    }
+    assert argocd_utils.shard_of('anything', 1) == 0
+
+
+def test_shards_are_balanced():
+    counts = Counter(argocd_utils.shard_of(key, 4) for key in KEYS)
+    assert set(counts) == {0, 1, 2, 3}
+    assert all(abs(count - len(KEYS) / 4) < len(KEYS) * 0.05 for count in counts.values())
+
+
+@pytest.mark.parametrize('before, after', [(4, 5), (5, 4), (1, 2), (3, 6)])
+def test_changing_the_shard_count_only_moves_keys_onto_or_off_changed_shards(before, after):
+    unchanged = set(range(min(before, after)))
+    for key in KEYS:
+        old, new = argocd_utils.shard_of(key, before), argocd_utils.shard_of(key, after)
+        if old != new:
+            assert old not in unchanged or new not in unchanged, key
+
+
+def shard_run(index, count, projects, repositories, applications):
+    """Results of one argocd-all shard: every project and repository, and its own applications"""
+    results = [{'service': name, 'service_type': 'project', 'outcome': 'applied'} for name in projects]
+    results += [{'service': name, 'service_type': 'repository', 'outcome': 'applied'} for name in repositories]
+    results += [
+        {'service': name, 'service_type': 'application', 'outcome': 'applied'}
+        for name in applications if argocd_utils.shard_of(name, count) == index
+    ]
+    return {'shard_index': index, 'shard_count': count, 'results': argocd_all.owned_results(results, (index, count))}
+
+
+def test_every_service_is_reported_by_exactly_one_shard():
+    projects = [f'proj-{index}' for index in range(20)]
+    repositories = [f'https://git.example.com/repo-{index}.git' for index in range(50)]
+    applications = KEYS[:300]
+    runs = [shard_run(index, 4, projects, repositories, applications) for index in range(4)]
+    reported = Counter((result['service_type'], result['service']) for run in runs for result in run['results'])
+    assert set(reported.values()) == {1}
+    assert len(reported) == len(projects) + len(repositories) + len(applications)
+
+    results, shards, problems = merge_results.merge_results([(f'shard-{run["shard_index"]}.json', run) for run in runs])
+    assert problems == [] and sorted(shards) == [0, 1, 2, 3] and len(results) == len(reported)
+
+
+def test_unsharded_runs_report_everything():
+    results = [{'service': 'proj', 'service_type': 'project', 'outcome': 'applied'}]
+    assert argocd_all.owned_results(results, None) == results
+
+
+def test_merge_detects_duplicates_and_missing_shards():
+    result = {'service': 'app', 'service_type': 'application', 'outcome': 'applied'}
+    files = [
+        ('shard-0.json', {'shard_index': 0, 'shard_count': 3, 'results': [result]}),
+        ('shard-1.json', {'shard_index': 1, 'shard_count': 3, 'results': [result]}),
+    ]
+    _, _, problems = merge_results.merge_results(files)
+    assert problems == [
+        "application 'app' was applied by shards 0 and 1",
+        "no results from shard(s) 2",
+    ]
+
+
+def test_merge_detects_disagreeing_shard_counts():
+    files = [
+        ('a.json', {'shard_index': 0, 'shard_count': 2, 'results': []}),
+        ('b.json', {'shard_index': 1, 'shard_count': 3, 'results': []}),
+    ]
+    _, _, problems = merge_results.merge_results(files)
+    assert problems == ["result files disagree on the shard count: [2, 3]"]
@@ -0,0 +1,90 @@
+import json
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from tfvars_parser import TfvarsSyntaxError, parse_tfvars
+
+
+def test_scalars():
+    assert parse_tfvars('name = "web"\nreplicas = 3\nenabled = true\nowner = null\n') == {
+        'name': 'web', 'replicas': 3, 'enabled': True, 'owner': None,
+    }
+
+
+def test_string_escapes():
+    text = r'value = "tab\there \"quoted\" back\\slash \u00e9 new\nline"' + '\n'
+    assert parse_tfvars(text) == {'value': 'tab\there "quoted" back\\slash \u00e9 new\nline'}
+
+
+def test_templates_are_kept_verbatim():
+    text = 'greeting = "hello ${var.name} %{ if true }x%{ endif } $${literal} ${lookup(m, "}")}"\n'
+    assert parse_tfvars(text) == {'greeting': 'hello ${var.name} %{ if true }x%{ endif } ${literal} ${lookup(m, "}")}'}
+
+
+def test_heredoc():
+    text = 'script = <<EOF\n  line one\n    line two\nEOF\nnext = 1\n'
+    assert parse_tfvars(text) == {'script': '  line one\n    line two\n', 'next': 1}
+
+
+def test_indented_heredoc_strips_the_common_margin():
+    text = 'script = <<-EOT\n    line one\n      line two\n\n    EOT\n'
+    assert parse_tfvars(text) == {'script': 'line one\n  line two\n\n'}
+
+
+def test_multiline_lists_and_maps():
+    text = '''
+zones = [
+  "a",
+  "b", # trailing comma and comment
+]
+tags = {
+  team   = "platform"
+  "cost-center": 42,
+  nested = { enabled = false, sizes = [1, 2] }
+}
+'''
+    assert parse_tfvars(text) == {
+        'zones': ['a', 'b'],
+        'tags': {'team': 'platform', 'cost-center': 42, 'nested': {'enabled': False, 'sizes': [1, 2]}},
+    }
+
+
+def test_comments():
+    text = '# hash\n// slashes\n/* block\n   comment */ region = "eu" /* inline */ # trailing\n'
+    assert parse_tfvars(text) == {'region': 'eu'}
+
+
+@pytest.mark.parametrize('literal, expected', [
+    ('1.5e3', 1500), ('2.0', 2), ('1E2', 100), ('-3', -3), ('1.25', 1.25), ('-0.5e-1', -0.05),
+])
+def test_numbers_match_terraform(literal, expected):
+    value = parse_tfvars(f'n = {literal}\n')['n']
+    assert value == expected and type(value) is type(expected)
+    assert json.dumps(value) == json.dumps(expected)
+
+
+@pytest.mark.parametrize('text, message', [
+    ('a = 1\na = 2\n', "variable 'a' is defined more than once"),
+    ('a = [1, 2\n', "expected ',' or ']' in list"),
+    ('a = { b = 1\n', "expected a variable name"),
+    ('a = 0x10\n', "invalid number '0x10'"),
+    ('a = "open\n', 'unterminated string'),
+    ('a = <<EOF\ntext\n', "heredoc is missing its closing 'EOF'"),
+    ('a = var.other\n', 'tfvars only allow literals'),
+    ('a = 1 b = 2\n', "expected a newline after 'a'"),
+    ('a = "\\q"\n', 'invalid escape sequence'),
+    ('/* open\na = 1\n', 'unterminated comment'),
+])
+def test_syntax_errors(text, message):
+    with pytest.raises(TfvarsSyntaxError, match=re.escape(message)):
+        parse_tfvars(text, source='dev.tfvars')
+
+
+def test_errors_point_at_the_line_and_column():
+    with pytest.raises(TfvarsSyntaxError, match=r'^dev\.tfvars:2:5: '):
+        parse_tfvars('a = 1\nb = @\n', source='dev.tfvars')
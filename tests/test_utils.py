@@ -0,0 +1,121 @@
+import base64
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+import utils as argocd_utils
+
+
+def application(spec, **metadata):
+    return {'metadata': {'name': 'app', **metadata}, 'spec': {'project': 'default', **spec}}
+
+
+def live(body, **status):
+    """What ArgoCD returns for an applied payload: server metadata, status, and no ``False`` values"""
+    applied = argocd_utils.stamp_fingerprint(body)
+    metadata = {**applied['metadata'], 'resourceVersion': '7', 'uid': 'abc'}
+    return {**applied, 'metadata': metadata, 'status': status or {'sync': {'status': 'Synced'}}}
+
+
+def test_removed_field_is_a_change():
+    applied = application({'syncPolicy': {'automated': {'prune': True}}})
+    desired = argocd_utils.stamp_fingerprint(application({'syncPolicy': {}}))
+    assert not argocd_utils.is_unchanged(desired, live(applied))
+
+
+def test_removed_label_is_a_change():
+    applied = application({}, labels={'team': 'platform'})
+    desired = argocd_utils.stamp_fingerprint(application({}))
+    assert not argocd_utils.is_unchanged(desired, live(applied))
+
+
+def test_applied_payload_is_unchanged():
+    body = application({'syncPolicy': {'automated': {'prune': False, 'selfHeal': True}}})
+    returned = live(body)
+    returned['spec'] = {'project': 'default', 'syncPolicy': {'automated': {'selfHeal': True}}}
+    assert argocd_utils.is_unchanged(argocd_utils.stamp_fingerprint(body), returned)
+
+
+def test_drift_of_a_managed_field_is_a_change():
+    body = application({'destination': {'namespace': 'apps'}})
+    returned = live(body)
+    returned['spec'] = {'project': 'default', 'destination': {'namespace': 'other'}}
+    assert not argocd_utils.is_unchanged(argocd_utils.stamp_fingerprint(body), returned)
+
+
+def test_unstamped_live_object_is_updated_once():
+    body = application({})
+    returned = live(body)
+    returned['metadata'].pop('annotations')
+    assert not argocd_utils.is_unchanged(argocd_utils.stamp_fingerprint(body), returned)
+
+
+def test_repository_removed_field_is_a_change():
+    desired = {'repo': 'https://example.com/repo.git'}
+    returned = {'repo': 'https://example.com/repo.git', 'type': 'git', 'project': 'default', 'connectionState': {'status': 'Successful'}}
+    assert not argocd_utils.is_unchanged(desired, returned)
+    assert argocd_utils.is_unchanged({**desired, 'project': 'default', 'insecure': False}, returned)
+
+
+def jwt(exp):
+    claims = base64.urlsafe_b64encode(json.dumps({'exp': exp}).encode()).decode().rstrip('=')
+    return f'header.{claims}.signature'
+
+
+def test_token_cache_roundtrip(tmp_path):
+    cache = argocd_utils.TokenCache(tmp_path / 'tokens.json')
+    token = jwt(time.time() + 3600)
+    cache.set('https://argocd.example.com', 'admin', token)
+    assert cache.get('https://argocd.example.com/', 'admin') == token
+    assert cache.get('https://argocd.example.com', 'other') is None
+
+
+@pytest.mark.parametrize('content', ['[]', 'null', '"token"', '{"key": null}', '{"key": {"token": "t"}}',
+                                     '{"key": {"exp": "soon", "token": "t"}}', '{"key": {"exp": 1e12, "token": 5}}', '{not json'])
+def test_malformed_token_cache_is_a_miss(tmp_path, content):
+    path = tmp_path / 'tokens.json'
+    path.write_text(content)
+    cache = argocd_utils.TokenCache(path)
+    assert cache.get('https://argocd.example.com', 'admin') is None
+    cache.set('https://argocd.example.com', 'admin', jwt(time.time() + 3600))
+    assert cache.get('https://argocd.example.com', 'admin') is not None
+    cache.invalidate('https://argocd.example.com', 'admin')
+    assert cache.get('https://argocd.example.com', 'admin') is None
+
+
+class FakeApiError(Exception):
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+def failing(*statuses):
+    """A call raising ``FakeApiError`` with each of ``statuses`` in turn, then returning 'ok'"""
+    calls = []
+    def call():
+        calls.append(len(calls))
+        if len(calls) <= len(statuses):
+            raise FakeApiError(statuses[len(calls) - 1])
+        return 'ok'
+    return call, calls
+
+
+def test_call_with_retries_retries_overload_without_the_argocd_client(monkeypatch):
+    monkeypatch.setattr(argocd_utils.time, 'sleep', lambda seconds: None)
+    monkeypatch.setitem(sys.modules, 'argocd', None)
+    call, calls = failing(503, 429)
+    assert argocd_utils.call_with_retries('list', call, errors=(FakeApiError,)) == 'ok'
+    assert len(calls) == 3
+
+
+def test_call_with_retries_does_not_repeat_a_create_after_a_gateway_error(monkeypatch):
+    monkeypatch.setattr(argocd_utils.time, 'sleep', lambda seconds: None)
+    call, calls = failing(502)
+    with pytest.raises(FakeApiError):
+        argocd_utils.call_with_retries('create', call, errors=(FakeApiError,), idempotent=False)
+    assert len(calls) == 1